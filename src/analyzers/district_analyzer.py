@@ -23,13 +23,15 @@ from analyzers.metrics_calculator import (
     calculate_safety_score,
     calculate_transport_score,
     calculate_green_score,
-    calculate_services_score
+    calculate_services_score,
+    calculate_scores_batch
 )
 from analyzers.normalizer import (
     normalize_min_max,
     handle_missing_values,
     safe_normalize
 )
+from utils.spatial_utils import read_shapefile
 from settings import settings
 
 
@@ -148,9 +150,12 @@ class DistrictAnalyzer:
         """Carga shapefiles desde settings."""
         print("\nCargando shapefiles...")
         
+        # Solo se leen las columnas que usan las métricas: gridcode de
+        # criminalidad e identificador de ruta de bus; el resto, solo geometría
+        
         # Criminalidad
         try:
-            self.crime_gdf = gpd.read_file(settings.SHP_CRIMES)
+            self.crime_gdf = read_shapefile(settings.SHP_CRIMES, columns=['gridcode'])
             if self.crime_gdf.crs != 'EPSG:4326':
                 self.crime_gdf = self.crime_gdf.to_crs('EPSG:4326')
             print(f"Zonas de criminalidad: {len(self.crime_gdf)}")
@@ -159,7 +164,7 @@ class DistrictAnalyzer:
         
         # Paradas de bus
         try:
-            self.bus_stops_gdf = gpd.read_file(settings.SHP_BUS_STOPS)
+            self.bus_stops_gdf = read_shapefile(settings.SHP_BUS_STOPS, columns=[])
             if self.bus_stops_gdf.crs != 'EPSG:4326':
                 self.bus_stops_gdf = self.bus_stops_gdf.to_crs('EPSG:4326')
             print(f"Paradas de bus: {len(self.bus_stops_gdf)}")
@@ -168,7 +173,7 @@ class DistrictAnalyzer:
         
         # Rutas de bus
         try:
-            self.bus_routes_gdf = gpd.read_file(settings.SHP_BUS_ROUTES)
+            self.bus_routes_gdf = read_shapefile(settings.SHP_BUS_ROUTES, columns=['Código_Ru'])
             if self.bus_routes_gdf.crs != 'EPSG:4326':
                 self.bus_routes_gdf = self.bus_routes_gdf.to_crs('EPSG:4326')
             print(f"Rutas de bus: {len(self.bus_routes_gdf)}")
@@ -177,7 +182,7 @@ class DistrictAnalyzer:
         
         # Estaciones de metro
         try:
-            self.metro_stations_gdf = gpd.read_file(settings.SHP_METRO_STATIONS)
+            self.metro_stations_gdf = read_shapefile(settings.SHP_METRO_STATIONS, columns=[])
             if self.metro_stations_gdf.crs != 'EPSG:4326':
                 self.metro_stations_gdf = self.metro_stations_gdf.to_crs('EPSG:4326')
             print(f"Estaciones de metro: {len(self.metro_stations_gdf)}")
@@ -186,7 +191,7 @@ class DistrictAnalyzer:
         
         # Línea de metro
         try:
-            self.metro_line_gdf = gpd.read_file(settings.SHP_METRO)
+            self.metro_line_gdf = read_shapefile(settings.SHP_METRO, columns=[])
             if self.metro_line_gdf.crs != 'EPSG:4326':
                 self.metro_line_gdf = self.metro_line_gdf.to_crs('EPSG:4326')
             print(f"Línea de metro: {len(self.metro_line_gdf)}")
@@ -216,12 +221,20 @@ class DistrictAnalyzer:
         if self.districts_gdf is None:
             raise ValueError("No se han cargado distritos. Usa load_data() primero.")
         
+        # Safety, green y services de todos los distritos en una pasada;
+        # si falla, se calculan distrito a distrito
+        batch_scores = self._analyze_batch_scores()
+        batch_rows = (
+            batch_scores.to_dict('records') if batch_scores is not None
+            else [None] * len(self.districts_gdf)
+        )
+        
         # Lista para almacenar resultados
         results = []
         
         # Iterar sobre cada distrito
-        for idx, district in self.districts_gdf.iterrows():
-            district_metrics = self._analyze_single_district(district, idx)
+        for (idx, district), scores in zip(self.districts_gdf.iterrows(), batch_rows):
+            district_metrics = self._analyze_single_district(district, idx, scores)
             results.append(district_metrics)
         
         # Crear DataFrame
@@ -235,13 +248,46 @@ class DistrictAnalyzer:
         
         return self.metrics_df
     
-    def _analyze_single_district(self, district: gpd.GeoSeries, district_idx: int) -> dict:
+    def _analyze_batch_scores(self) -> Optional[pd.DataFrame]:
+        """
+        Calcula safety, green y services de todos los distritos con un
+        spatial join por capa (calculate_scores_batch).
+        
+        Returns:
+            DataFrame con esas columnas alineado con districts_gdf, o None
+            si el cálculo en lote falla
+        """
+        green_config = self.config.get('analysis', {}).get('green', {})
+        
+        try:
+            return calculate_scores_batch(
+                self.districts_gdf,
+                crime_gdf=self.crime_gdf,
+                parks_gdf=self.parks_gdf,
+                tourist_places_gdf=self.tourist_places_gdf,
+                gridcode_field='gridcode',
+                invert_scale=self.config.get('normalization', {}).get('safety_inversion', True),
+                ideal_coverage=green_config.get('ideal_green_coverage', 0.15),
+                min_park_area=green_config.get('min_park_area', 1000.0)
+            )
+        except Exception as e:
+            print(f" Error en el cálculo por lotes, se calcula por distrito: {e}")
+            return None
+    
+    def _analyze_single_district(
+        self,
+        district: gpd.GeoSeries,
+        district_idx: int,
+        batch_scores: Optional[dict] = None
+    ) -> dict:
         """
         Analiza un distrito individual y calcula todas sus métricas.
         
         Args:
             district: Serie con datos del distrito
             district_idx: Índice del distrito
+            batch_scores: Safety, green y services ya calculados en lote;
+                          si es None se calculan para este distrito
         
         Returns:
             Dict con todas las métricas del distrito
@@ -260,7 +306,9 @@ class DistrictAnalyzer:
         }
         
         # Calcular Safety Score
-        if self.crime_gdf is not None:
+        if batch_scores is not None:
+            metrics['safety'] = batch_scores['safety']
+        elif self.crime_gdf is not None:
             safety = calculate_safety_score(
                 district_polygon,
                 self.crime_gdf,
@@ -283,7 +331,9 @@ class DistrictAnalyzer:
         metrics['transport'] = transport
         
         # Calcular Green Score
-        if self.parks_gdf is not None:
+        if batch_scores is not None:
+            metrics['green'] = batch_scores['green']
+        elif self.parks_gdf is not None:
             green_config = self.config.get('analysis', {}).get('green', {})
             green = calculate_green_score(
                 district_polygon,
@@ -296,7 +346,9 @@ class DistrictAnalyzer:
             metrics['green'] = 0.0
         
         # Calcular Services Score
-        if self.tourist_places_gdf is not None:
+        if batch_scores is not None:
+            metrics['services'] = batch_scores['services']
+        elif self.tourist_places_gdf is not None:
             services = calculate_services_score(
                 district_polygon,
                 tourist_places_gdf=self.tourist_places_gdf
@@ -317,7 +369,7 @@ class DistrictAnalyzer:
         }
         
         config_str = json.dumps(cache_config, sort_keys=True)
-        cache_key = hashlib.md5(config_str.encode()).hexdigest()[:8]
+        cache_key = hashlib.blake2b(config_str.encode(), digest_size=4).hexdigest()
         
         return cache_key
     
@@ -3,8 +3,12 @@ Funciones para calcular métricas individuales de distritos.
 Cada función es pura (stateless) y retorna un score normalizable.
 """
 
+import logging
+import weakref
 import geopandas as gpd
 import numpy as np
+import shapely
+from pyproj import CRS
 from typing import Optional, Union
 from shapely.geometry import Polygon, MultiPolygon
 import pandas as pd
@@ -19,9 +23,100 @@ from utils.spatial_utils import (
     find_nearest_feature,
     safe_spatial_join,
     get_polygon_centroid,
-    calculate_density
+    calculate_density,
+    get_transformer,
+    transform_geometries
 )
 
+logger = logging.getLogger(__name__)
+
+
+# Orden canónico de los componentes del score de transporte
+TRANSPORT_COMPONENTS = ('bus_density', 'route_connectivity', 'metro')
+
+# Escalones de score por distancia (m) al metro: bins[i] es el límite
+# superior (exclusivo) del tramo con score scores[i]
+METRO_STATION_DIST_BINS = np.array([500.0, 1000.0, 2000.0])
+METRO_STATION_SCORES = np.array([0.8, 0.6, 0.3, 0.0])
+METRO_LINE_DIST_BINS = np.array([1000.0, 2000.0])
+METRO_LINE_SCORES = np.array([0.4, 0.2, 0.0])
+
+# CRS de los polígonos de distrito
+_CRS_WGS84 = CRS.from_epsg(4326)
+
+# Capas ya reproyectadas a WGS84: id(original) -> (weakref al original,
+# reproyectada). La caché no mantiene viva la capa original: la entrada se
+# descarta cuando ésta se libera (los GeoDataFrame no son hashables, así que
+# no sirve un WeakKeyDictionary)
+_wgs84_cache: dict = {}
+_WGS84_CACHE_SIZE = 8
+
+# CRS métrico usado para áreas (UTM 17S, el mismo que en green score)
+UTM_CRS = 'EPSG:32717'
+
+
+
+def _to_wgs84(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """
+    Retorna la capa en EPSG:4326, reutilizando la reproyección si la misma
+    capa ya se convirtió antes (las funciones se llaman una vez por distrito).
+    
+    Notes:
+        - La caché asume que la capa de entrada no se modifica in-place
+    """
+    if gdf.crs is not None and gdf.crs.equals(_CRS_WGS84):
+        return gdf
+    
+    key = id(gdf)
+    cached = _wgs84_cache.get(key)
+    if cached is not None and cached[0]() is gdf:
+        return cached[1]
+    
+    converted = gdf.to_crs(_CRS_WGS84)
+    
+    if len(_wgs84_cache) >= _WGS84_CACHE_SIZE:
+        _wgs84_cache.pop(next(iter(_wgs84_cache)))
+    
+    def _discard(ref, key=key):
+        # Solo borra la entrada si sigue siendo la de esta referencia
+        entry = _wgs84_cache.get(key)
+        if entry is not None and entry[0] is ref:
+            del _wgs84_cache[key]
+    
+    _wgs84_cache[key] = (weakref.ref(gdf, _discard), converted)
+    
+    return converted
+
+
+def _step_score(distance, bins: np.ndarray, scores: np.ndarray):
+    """
+    Convierte distancias en scores por tramos sin ramas (escalar o array).
+    
+    `distance < bins[0]` → scores[0], ..., `distance >= bins[-1]` o NaN → scores[-1]
+    """
+    result = scores[np.searchsorted(bins, distance, side='right')]
+    return float(result) if np.ndim(result) == 0 else result
+
+
+def projected_areas(geometries: np.ndarray) -> np.ndarray:
+    """
+    Calcula áreas en m² de geometrías en WGS84 reproyectándolas en bloque a UTM.
+    
+    Args:
+        geometries: Array de geometrías en EPSG:4326
+    
+    Returns:
+        np.ndarray: Áreas en m². Si la reproyección no es válida (geometrías
+                    fuera de la zona UTM) se usan las áreas planas originales.
+    """
+    projected = transform_geometries(geometries, get_transformer('EPSG:4326', UTM_CRS))
+    areas = shapely.area(projected)
+    
+    if not np.all(np.isfinite(areas)):
+        return shapely.area(geometries)
+    
+    return areas
+
 
 def calculate_safety_score(
     district_polygon: Union[Polygon, MultiPolygon],
@@ -73,9 +168,7 @@ def calculate_safety_score(
             return 0.5
         
         # Asegurar mismo CRS
-        district_crs = 'EPSG:4326'
-        if crime_gdf.crs != district_crs:
-            crime_gdf = crime_gdf.to_crs(district_crs)
+        crime_gdf = _to_wgs84(crime_gdf)
         
         # Filtrar zonas que intersectan con el distrito
         intersecting_crimes = crime_gdf[crime_gdf.intersects(district_polygon)].copy()
@@ -83,43 +176,50 @@ def calculate_safety_score(
         if len(intersecting_crimes) == 0:
             return 0.5
         
-        # Calcular intersecciones y áreas
-        total_weighted_gridcode = 0.0
-        total_area = 0.0
+        # Calcular intersecciones
+        intersections = []
+        valid_codes = []
+        
+        # Columnas extraídas una sola vez (evita crear una Serie por fila)
+        geoms = intersecting_crimes.geometry.values
+        codes = intersecting_crimes[gridcode_field].to_numpy()
         
-        for idx, crime_zone in intersecting_crimes.iterrows():
+        for geom, gridcode in zip(geoms, codes):
             try:
                 # Calcular intersección
-                intersection = district_polygon.intersection(crime_zone.geometry)
+                intersection = district_polygon.intersection(geom)
                 
                 if intersection.is_empty:
                     continue
                 
-                # Área de intersección
-                area = intersection.area
-                
-                if area <= 0:
-                    continue
-                
-                # Gridcode de esta zona
-                gridcode = crime_zone[gridcode_field]
-                
                 # Validar que gridcode está en rango esperado (1-5)
                 if not (1 <= gridcode <= 5):
                     print(f" Gridcode fuera de rango: {gridcode}")
                     continue
                 
-                # Acumular peso por área
-                total_weighted_gridcode += gridcode * area
-                total_area += area
+                intersections.append(intersection)
+                valid_codes.append(gridcode)
                 
             except Exception as e:
                 print(f" Error procesando zona de crimen: {e}")
                 continue
         
+        if len(intersections) == 0:
+            return 0.5
+        
+        # Áreas de intersección en m² (una sola reproyección para todas)
+        areas = projected_areas(np.array(intersections, dtype=object))
+        positive = areas > 0
+        
+        total_area = areas[positive].sum()
         if total_area == 0:
             return 0.5
         
+        # Acumular peso por área
+        total_weighted_gridcode = (
+            np.asarray(valid_codes, dtype=float)[positive] * areas[positive]
+        ).sum()
+        
         # Promedio ponderado
         avg_gridcode = total_weighted_gridcode / total_area
         
@@ -141,7 +241,7 @@ def calculate_safety_score(
         return safety_score
         
     except Exception as e:
-        print(f"Error calculando safety score: {e}")
+        logger.exception("Error calculando safety score: %s", e)
         return 0.5
 
 
@@ -197,6 +297,15 @@ def calculate_transport_score(
             'metro': 0.3
         }
     
+    # Centroide perezoso: solo se calcula si alguna rama lo necesita
+    _centroid = None
+    
+    def centroid():
+        nonlocal _centroid
+        if _centroid is None:
+            _centroid = get_polygon_centroid(district_polygon)
+        return _centroid
+    
     try:
         scores = {}
         available_weights = {}
@@ -260,22 +369,15 @@ def calculate_transport_score(
                 metro_score = 1.0
             else:
                 # No tiene estación, calcular distancia a la más cercana
-                centroid = get_polygon_centroid(district_polygon)
-                if centroid is not None:
-                    nearest = find_nearest_feature(centroid, metro_stations_gdf, max_distance=2000)
+                district_centroid = centroid()
+                if district_centroid is not None:
+                    nearest = find_nearest_feature(district_centroid, metro_stations_gdf, max_distance=2000)
                     
                     if nearest is not None:
                         distance = nearest['distance']
                         # Normalizar: < 500m = bueno, > 2000m = malo
-                        # Score decrece linealmente
-                        if distance < 500:
-                            metro_score = 0.8
-                        elif distance < 1000:
-                            metro_score = 0.6
-                        elif distance < 2000:
-                            metro_score = 0.3
-                        else:
-                            metro_score = 0.0
+                        # Score decrece por tramos
+                        metro_score = _step_score(distance, METRO_STATION_DIST_BINS, METRO_STATION_SCORES)
                     else:
                         metro_score = 0.0
             
@@ -290,16 +392,13 @@ def calculate_transport_score(
                 metro_score = 0.7  # Tiene línea pero sin estaciones específicas
             else:
                 # Calcular distancia a la línea
-                centroid = get_polygon_centroid(district_polygon)
-                if centroid is not None:
-                    min_distance = metro_line_gdf.geometry.distance(centroid).min()
+                district_centroid = centroid()
+                if district_centroid is not None:
+                    min_distance = np.nanmin(
+                        shapely.distance(np.asarray(metro_line_gdf.geometry.values), district_centroid)
+                    )
                     
-                    if min_distance < 1000:
-                        metro_score = 0.4
-                    elif min_distance < 2000:
-                        metro_score = 0.2
-                    else:
-                        metro_score = 0.0
+                    metro_score = _step_score(min_distance, METRO_LINE_DIST_BINS, METRO_LINE_SCORES)
             
             has_metro_data = True
         
@@ -312,26 +411,22 @@ def calculate_transport_score(
             # No hay datos de transporte
             return 0.0
         
+        # Vectores en orden fijo (permite apilar distritos en una matriz (D, 3))
+        score_vec = np.array([scores.get(c, 0.0) for c in TRANSPORT_COMPONENTS])
+        weight_vec = np.array([available_weights.get(c, 0.0) for c in TRANSPORT_COMPONENTS])
+        
         # Normalizar pesos disponibles
-        total_weight = sum(available_weights.values())
+        total_weight = weight_vec.sum()
         if total_weight == 0:
             return 0.0
         
-        # Score ponderado
-        final_score = sum(
-            scores[component] * (available_weights[component] / total_weight)
-            for component in scores
-        )
-        
-        # Asegurar rango [0, 1]
-        final_score = np.clip(final_score, 0.0, 1.0)
+        # Score ponderado y asegurar rango [0, 1]
+        final_score = np.clip(np.dot(score_vec, weight_vec) / total_weight, 0.0, 1.0)
         
-        return final_score
+        return float(final_score)
         
     except Exception as e:
-        print(f"Error calculando transport score: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error calculando transport score: %s", e)
         return 0.0
 
 def calculate_green_score(
@@ -411,9 +506,7 @@ def calculate_green_score(
         return green_score
         
     except Exception as e:
-        print(f"Error calculando green score: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error calculando green score: %s", e)
         return 0.0
 
 
@@ -472,10 +565,7 @@ def calculate_services_score(
     
     try:
         # Asegurar mismo CRS
-        district_crs = 'EPSG:4326'
-        tourist_places = tourist_places_gdf.copy()
-        if tourist_places.crs != district_crs:
-            tourist_places = tourist_places.to_crs(district_crs)
+        tourist_places = _to_wgs84(tourist_places_gdf)
         
         # Encontrar POIs dentro del distrito
         pois_in_district = points_in_polygon(district_polygon, tourist_places)
@@ -486,18 +576,29 @@ def calculate_services_score(
         # Calcular score ponderado
         total_weighted_pois = 0.0
         
-        for idx, poi in pois_in_district.iterrows():
+        # Columnas extraídas una sola vez (evita crear una Serie por fila)
+        num_pois = len(pois_in_district)
+        missing = np.full(num_pois, None, dtype=object)
+        shops = (
+            pois_in_district['shop'].to_numpy()
+            if 'shop' in pois_in_district.columns else missing
+        )
+        tourism_types = (
+            pois_in_district['tourism'].to_numpy()
+            if 'tourism' in pois_in_district.columns else missing
+        )
+        
+        for shop, tourism_type in zip(shops, tourism_types):
             # Determinar tipo de POI
             poi_weight = weights['other']  # Default
             
             # Verificar si tiene campo 'shop'
-            if 'shop' in poi.index and pd.notna(poi['shop']):
-                if poi['shop'] == 'mall':
+            if pd.notna(shop):
+                if shop == 'mall':
                     poi_weight = weights['mall']
             
             # Verificar si tiene campo 'tourism'
-            elif 'tourism' in poi.index and pd.notna(poi['tourism']):
-                tourism_type = poi['tourism']
+            elif pd.notna(tourism_type):
                 if tourism_type in weights:
                     poi_weight = weights[tourism_type]
                 else:
@@ -511,7 +612,230 @@ def calculate_services_score(
         return services_score
         
     except Exception as e:
-        print(f"Error calculando services score: {e}")
-        import traceback
-        traceback.print_exc()
-        return 0.0
\ No newline at end of file
+        logger.exception("Error calculando services score: %s", e)
+        return 0.0
+
+def calculate_scores_batch(
+    districts_gdf: gpd.GeoDataFrame,
+    crime_gdf: Optional[gpd.GeoDataFrame] = None,
+    parks_gdf: Optional[gpd.GeoDataFrame] = None,
+    tourist_places_gdf: Optional[gpd.GeoDataFrame] = None,
+    gridcode_field: str = 'gridcode',
+    invert_scale: bool = True,
+    ideal_coverage: float = 0.15,
+    min_park_area: float = 1000.0,
+    services_weights: Optional[dict] = None
+) -> pd.DataFrame:
+    """
+    Calcula los scores de seguridad, espacios verdes y servicios de todos
+    los distritos a la vez.
+    
+    En lugar de llamar a las funciones por distrito (D llamadas, cada una
+    recorriendo la capa completa), se hace un único spatial join por capa
+    y se agregan los resultados con groupby.
+    
+    Args:
+        districts_gdf: GeoDataFrame con los polígonos de los distritos
+        crime_gdf: GeoDataFrame con zonas de criminalidad (campo gridcode)
+        parks_gdf: GeoDataFrame con parques
+        tourist_places_gdf: GeoDataFrame con lugares turísticos y servicios
+        gridcode_field: Nombre del campo con el código de criminalidad
+        invert_scale: Igual que en calculate_safety_score
+        ideal_coverage: Igual que en calculate_green_score
+        min_park_area: Igual que en calculate_green_score (m²)
+        services_weights: Igual que `weights` en calculate_services_score
+    
+    Returns:
+        DataFrame con columnas 'safety', 'green' y 'services', con el mismo
+        índice que districts_gdf
+    
+    Example:
+        >>> scores = calculate_scores_batch(districts_gdf, crime_gdf, parks_gdf, pois_gdf)
+        >>> scores['safety'].describe()
+    
+    Notes:
+        - Los valores por defecto (sin datos o polígono inválido) son los mismos
+          que en las funciones por distrito: safety=0.5, green=0.0, services=0.0
+        - El score de transporte se mantiene por distrito (depende de
+          búsquedas de vecino más cercano)
+    """
+    if districts_gdf is None or len(districts_gdf) == 0:
+        return pd.DataFrame(columns=['safety', 'green', 'services'], dtype=float)
+    
+    result = pd.DataFrame(
+        {'safety': 0.5, 'green': 0.0, 'services': 0.0},
+        index=districts_gdf.index
+    )
+    
+    # Trabajar con índice posicional y solo distritos válidos
+    districts = districts_gdf[['geometry']].reset_index(drop=True)
+    districts = districts[districts.geometry.notna() & districts.geometry.is_valid]
+    
+    if len(districts) == 0:
+        return result
+    
+    try:
+        safety = _safety_scores_batch(districts, crime_gdf, gridcode_field, invert_scale)
+        if safety is not None:
+            result['safety'] = safety.reindex(range(len(result)), fill_value=0.5).to_numpy()
+    except Exception as e:
+        logger.exception("Error calculando safety scores en lote: %s", e)
+    
+    try:
+        green = _green_scores_batch(districts, parks_gdf, ideal_coverage, min_park_area)
+        if green is not None:
+            result['green'] = green.reindex(range(len(result)), fill_value=0.0).to_numpy()
+    except Exception as e:
+        logger.exception("Error calculando green scores en lote: %s", e)
+    
+    try:
+        services = _services_scores_batch(districts, tourist_places_gdf, services_weights)
+        if services is not None:
+            result['services'] = services.reindex(range(len(result)), fill_value=0.0).to_numpy()
+    except Exception as e:
+        logger.exception("Error calculando services scores en lote: %s", e)
+    
+    return result
+
+
+def _intersection_areas(
+    districts: gpd.GeoDataFrame,
+    layer: gpd.GeoDataFrame,
+    joined: gpd.GeoDataFrame,
+    projected: bool = False
+) -> np.ndarray:
+    """Área de intersección de cada par (distrito, feature) de un sjoin."""
+    left = np.asarray(districts.geometry.values)[districts.index.get_indexer(joined.index)]
+    right = np.asarray(layer.geometry.values)[joined['index_right'].to_numpy()]
+    intersections = shapely.intersection(left, right)
+    
+    if projected:
+        return projected_areas(intersections)
+    return shapely.area(intersections)
+
+
+def _safety_scores_batch(
+    districts: gpd.GeoDataFrame,
+    crime_gdf: Optional[gpd.GeoDataFrame],
+    gridcode_field: str,
+    invert_scale: bool
+) -> Optional[pd.Series]:
+    """Promedio de gridcode ponderado por área para todos los distritos."""
+    if crime_gdf is None or len(crime_gdf) == 0 or gridcode_field not in crime_gdf.columns:
+        return None
+    
+    crimes = crime_gdf[['geometry', gridcode_field]]
+    if districts.crs is not None and crimes.crs != districts.crs:
+        crimes = crimes.to_crs(districts.crs)
+    
+    # Solo gridcodes en rango esperado (1-5)
+    crimes = crimes[crimes[gridcode_field].between(1, 5)].reset_index(drop=True)
+    
+    joined = gpd.sjoin(districts, crimes, predicate='intersects')
+    if len(joined) == 0:
+        return None
+    
+    areas = _intersection_areas(districts, crimes, joined, projected=districts.crs == 'EPSG:4326')
+    gridcodes = crimes[gridcode_field].to_numpy(dtype=float)[joined['index_right'].to_numpy()]
+    
+    pairs = pd.DataFrame({
+        'weighted': gridcodes * areas,
+        'area': areas
+    }, index=joined.index)
+    pairs = pairs[pairs['area'] > 0]
+    
+    totals = pairs.groupby(level=0).sum()
+    avg_gridcode = totals['weighted'] / totals['area']
+    
+    if invert_scale:
+        safety = (5 - avg_gridcode) / 4.0
+    else:
+        safety = (avg_gridcode - 1) / 4.0
+    
+    return safety.clip(0.0, 1.0)
+
+
+def _green_scores_batch(
+    districts: gpd.GeoDataFrame,
+    parks_gdf: Optional[gpd.GeoDataFrame],
+    ideal_coverage: float,
+    min_park_area: float
+) -> Optional[pd.Series]:
+    """Cobertura de parques normalizada para todos los distritos."""
+    if parks_gdf is None or len(parks_gdf) == 0:
+        return None
+    
+    parks = parks_gdf[parks_gdf.geometry.type.isin(['Polygon', 'MultiPolygon'])]
+    if len(parks) == 0:
+        return None
+    
+    # Filtrar por área mínima medida en UTM (m²)
+    parks_area_m2 = parks.geometry.to_crs('EPSG:32717').area
+    parks = parks[(parks_area_m2 >= min_park_area).to_numpy()]
+    parks = parks[parks.geometry.is_valid][['geometry']].reset_index(drop=True)
+    
+    if len(parks) == 0:
+        return None
+    
+    if districts.crs is not None and parks.crs != districts.crs:
+        parks = parks.to_crs(districts.crs)
+    
+    joined = gpd.sjoin(districts, parks, predicate='intersects')
+    if len(joined) == 0:
+        return None
+    
+    areas = pd.Series(_intersection_areas(districts, parks, joined), index=joined.index)
+    covered = areas.groupby(level=0).sum()
+    district_areas = districts.geometry.area.loc[covered.index]
+    
+    coverage = (covered / district_areas).where(district_areas > 0, 0.0).clip(upper=1.0)
+    
+    return (coverage / ideal_coverage).clip(upper=1.0)
+
+
+def _services_scores_batch(
+    districts: gpd.GeoDataFrame,
+    tourist_places_gdf: Optional[gpd.GeoDataFrame],
+    weights: Optional[dict]
+) -> Optional[pd.Series]:
+    """Suma ponderada de POIs por distrito, normalizada a 10 POIs."""
+    if tourist_places_gdf is None or len(tourist_places_gdf) == 0:
+        return None
+    
+    if weights is None:
+        weights = {
+            'mall': 1.5,
+            'museum': 1.2,
+            'attraction': 1.0,
+            'viewpoint': 1.0,
+            'gallery': 1.0,
+            'theme_park': 1.2,
+            'other': 0.8
+        }
+    
+    pois = tourist_places_gdf.reset_index(drop=True)
+    if districts.crs is not None and pois.crs != districts.crs:
+        pois = pois.to_crs(districts.crs)
+    
+    missing = pd.Series(None, index=pois.index, dtype=object)
+    shop = pois['shop'] if 'shop' in pois.columns else missing
+    tourism = pois['tourism'] if 'tourism' in pois.columns else missing
+    
+    # Peso de cada POI con las mismas reglas que calculate_services_score
+    has_shop = shop.notna()
+    use_tourism = ~has_shop & tourism.notna()
+    
+    poi_weight = pd.Series(weights['other'], index=pois.index, dtype=float)
+    poi_weight[has_shop & (shop == 'mall')] = weights['mall']
+    poi_weight[use_tourism] = tourism[use_tourism].map(weights).fillna(weights['other'])
+    
+    pois = gpd.GeoDataFrame({'poi_weight': poi_weight}, geometry=pois.geometry, crs=pois.crs)
+    
+    joined = gpd.sjoin(pois, districts, predicate='within')
+    if len(joined) == 0:
+        return None
+    
+    total_weighted_pois = joined.groupby('index_right')['poi_weight'].sum()
+    
+    ideal_pois = 10.0
+    return (total_weighted_pois / ideal_pois).clip(upper=1.0)
@@ -5,9 +5,9 @@ from .heatmap_layer import HeatMapLayer
 class CrimesAdapter(HeatMapLayer):
     _shapefile_source = None
 
-    def __init__(self, shapefile_path, intensity_field=None, color_field='color'):
+    def __init__(self, shapefile_path, intensity_field=None, color_field='color', bbox=None):
         self.intensity_field = intensity_field
-        self._shapefile_source = ShapefileSource(shapefile_path, color_field)
+        self._shapefile_source = ShapefileSource(shapefile_path, color_field, bbox=bbox)
     
     def to_folium_colored_polygons(self, style_function=None):
         if self._shapefile_source.gdf is None or len(self._shapefile_source.gdf) == 0:
@@ -15,10 +15,12 @@ class CrimesAdapter(HeatMapLayer):
         
         try:
             if style_function is None and self._shapefile_source.color_field in self._shapefile_source.gdf.columns:
+                # Los colores faltantes ya se rellenaron al cargar el shapefile
+                cf = self._shapefile_source.color_field
+                
                 def style_function(feature):
-                    color = feature['properties'].get(self._shapefile_source.color_field, '#3388ff')
                     return {
-                        'fillColor': color,
+                        'fillColor': feature['properties'][cf],
                         'color': 'black',
                         'weight': 0.5,
                         'fillOpacity': 0.7
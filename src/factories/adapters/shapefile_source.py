@@ -1,32 +1,84 @@
+import logging
+import os
+from functools import lru_cache
+
 import geopandas as gpd
+import numpy as np
 import folium
 
+from utils.spatial_utils import read_shapefile, reproject, simplify_geometries
+
+logger = logging.getLogger(__name__)
+
+# Simplificación para visualización en WGS84 (~10 m) y precisión de coordenadas
+SIMPLIFY_TOLERANCE = 1e-4
+COORDINATE_PRECISION = 1e-6
+DEFAULT_COLOR = '#3388ff'
+
+
+@lru_cache(maxsize=32)
+def _load_source(shapefile_path, color_field, bbox, simplify_tolerance, mtime):
+    """
+    Lee, reproyecta y simplifica un shapefile una sola vez por combinación
+    de parámetros. `mtime` forma parte de la clave para invalidar la caché
+    si el archivo cambia en disco.
+    """
+    gdf = read_shapefile(shapefile_path, bbox=bbox)
+    
+    # Reproyectar a WGS84 para Folium
+    if gdf.crs is None:
+        logger.debug("Sin CRS, intentando inferir...")
+        # Intentar diferentes CRS comunes; total_bounds funciona para
+        # cualquier tipo de geometría, no solo puntos
+        max_x = gdf.total_bounds[2] if len(gdf) > 0 else np.nan
+        if max_x > 180:  # Probablemente proyectado
+            gdf = gdf.set_crs("EPSG:32717", allow_override=True)
+        else:
+            gdf = gdf.set_crs("EPSG:4326", allow_override=True)
+    
+    if gdf.crs.to_string() != "EPSG:4326":
+        gdf = reproject(gdf, "EPSG:4326", parallel=True)
+    
+    # Aligerar geometrías: solo se usan para dibujar en Folium
+    if simplify_tolerance:
+        gdf = simplify_geometries(
+            gdf,
+            tolerance=simplify_tolerance,
+            grid_size=COORDINATE_PRECISION
+        )
+    
+    # Resolver colores faltantes una sola vez en lugar de en cada feature
+    if color_field and color_field in gdf.columns:
+        gdf[color_field] = gdf[color_field].fillna(DEFAULT_COLOR).astype('string')
+    
+    return gdf
+
 
 class ShapefileSource:
     
-    def __init__(self, shapefile_path, color_field=None):
+    def __init__(self, shapefile_path, color_field=None, simplify_tolerance=SIMPLIFY_TOLERANCE, bbox=None):
         self.shapefile_path = shapefile_path
         self.color_field = color_field
+        self.bbox = bbox
+        self.simplify_tolerance = simplify_tolerance
         self.gdf = None
+        self._geojson_str = None
         self._load_data()
     
     def _load_data(self):
         try:
-            self.gdf = gpd.read_file(self.shapefile_path)
-            
-            # Reproyectar a WGS84 para Folium
-            if self.gdf.crs is None:
-                print("Sin CRS, intentando inferir...")
-                # Intentar diferentes CRS comunes
-                if self.gdf.geometry.x.max() > 180:  # Probablemente proyectado
-                    self.gdf = self.gdf.set_crs("EPSG:32717", allow_override=True)
-                else:
-                    self.gdf = self.gdf.set_crs("EPSG:4326", allow_override=True)
+            # La caché comparte el GeoDataFrame entre todas las fuentes con los
+            # mismos parámetros: cada instancia recibe su propia copia para que
+            # modificar self.gdf no afecte a las demás ni a cargas posteriores
+            self.gdf = _load_source(
+                self.shapefile_path,
+                self.color_field,
+                tuple(self.bbox) if self.bbox is not None else None,
+                self.simplify_tolerance,
+                os.path.getmtime(self.shapefile_path)
+            ).copy()
             
-            if self.gdf.crs.to_string() != "EPSG:4326":
-                self.gdf = self.gdf.to_crs("EPSG:4326")
-            
-            print(f"✓ Shapefile cargado: {len(self.gdf)} geometrías")
+            logger.debug("Shapefile cargado: %d geometrías", len(self.gdf))
             
         except Exception as e:
             print(f"Error cargando shapefile: {e}")
@@ -50,10 +102,11 @@ class ShapefileSource:
             # Función de estilo por defecto
             if style_function is None:
                 if self.color_field and self.color_field in self.gdf.columns:
+                    cf = self.color_field
+                    
                     def style_function(feature):
-                        color = feature['properties'].get(self.color_field, '#3388ff')
                         return {
-                            'fillColor': color,
+                            'fillColor': feature['properties'][cf],
                             'color': 'black',
                             'weight': 0.5,
                             'fillOpacity': 0.7
@@ -61,7 +114,7 @@ class ShapefileSource:
                 else:
                     def style_function(feature):
                         return {
-                            'fillColor': '#3388ff',
+                            'fillColor': DEFAULT_COLOR,
                             'color': 'black',
                             'weight': 0.5,
                             'fillOpacity': 0.7
@@ -77,9 +130,9 @@ class ShapefileSource:
             else:
                 tooltip = None
             
-            # Crear GeoJson
+            # Crear GeoJson a partir del GeoJSON ya serializado
             geojson = folium.GeoJson(
-                self.gdf,
+                self._to_geojson_str(),
                 style_function=style_function,
                 tooltip=tooltip
             )
@@ -88,4 +141,55 @@ class ShapefileSource:
             
         except Exception as e:
             print(f"Error convirtiendo a GeoJson: {e}")
-            return None
\ No newline at end of file
+            return None
+    
+    def intersecting(self, geometries):
+        """
+        Filtra las geometrías cargadas que intersectan con `geometries`
+        usando el índice espacial (STRtree) en lugar de comparar una a una
+        
+        Args:
+            geometries: Geometría shapely, GeoSeries o GeoDataFrame
+            
+        Returns:
+            GeoDataFrame con las geometrías que intersectan
+        """
+        if self.gdf is None or len(self.gdf) == 0:
+            return self.gdf
+        
+        if isinstance(geometries, (gpd.GeoSeries, gpd.GeoDataFrame)):
+            if geometries.crs is not None and geometries.crs != self.gdf.crs:
+                geometries = geometries.to_crs(self.gdf.crs)
+            geometries = geometries.geometry.values
+        
+        idx = self.gdf.sindex.query(geometries, predicate='intersects')
+        
+        # Con varias geometrías de consulta se obtienen pares (consulta, índice)
+        if idx.ndim == 2:
+            idx = idx[1]
+        
+        return self.gdf.iloc[np.unique(idx)]
+    
+    def as_arrow(self):
+        """
+        Exporta las geometrías cargadas como tabla Arrow (geometría en WKB)
+        para consumirlas sin pasar por objetos shapely
+        
+        Returns:
+            pyarrow.Table o None si no hay datos
+        """
+        if self.gdf is None:
+            return None
+        
+        import pyarrow as pa
+        
+        return pa.table(self.gdf.to_arrow(geometry_encoding='WKB'))
+    
+    def _to_geojson_str(self):
+        """
+        Serializa el GeoDataFrame a GeoJSON una sola vez por instancia
+        (el GeoDataFrame cargado no se modifica después de la carga)
+        """
+        if self._geojson_str is None:
+            self._geojson_str = self.gdf.to_json(drop_id=False)
+        return self._geojson_str
@@ -6,11 +6,12 @@ from .adapters.crimes_adapter import CrimesAdapter
 
 class CrimesLayerFactory(MapLayerFactory):
     
-    def __init__(self, shapefile_path=None, layer_type='colored_polygons', intensity_field=None, color_field='color'):
+    def __init__(self, shapefile_path=None, layer_type='colored_polygons', intensity_field=None, color_field='color', bbox=None):
         self.shapefile_path = shapefile_path
         self.layer_type = layer_type
         self.intensity_field = intensity_field
         self.color_field = color_field
+        self.bbox = bbox
     
     def create_layer(self, citygraph=None) -> HeatMapLayer:
         layers = []
@@ -22,7 +23,8 @@ class CrimesLayerFactory(MapLayerFactory):
             adapter = CrimesAdapter(
                 self.shapefile_path,
                 intensity_field=self.intensity_field,
-                color_field=self.color_field
+                color_field=self.color_field,
+                bbox=self.bbox
             )
             
             # Crear la visualización según el tipo
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from .route import Route
 from .stop import Stop
 from .map import Map
@@ -16,4 +17,14 @@ class RoadAxisFactory(ABC):
     
     @abstractmethod
     def create_map(self) -> Map:
-        pass
\ No newline at end of file
+        pass
+    
+    def create_route_and_stop(self):
+        """
+        Crea la ruta y las paradas en paralelo: son lecturas de archivos
+        independientes y GDAL/PROJ liberan el GIL
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            route = executor.submit(self.create_route)
+            stop = executor.submit(self.create_stop)
+            return route.result(), stop.result()
\ No newline at end of file
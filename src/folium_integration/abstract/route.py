@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 import geopandas as gpd
+from utils.spatial_utils import read_cached_shapefile
 
 
 class Route(ABC):
@@ -7,7 +8,15 @@ class Route(ABC):
     def __init__(self, shapefile_path):
         self.shapefile_path = shapefile_path
         self.gdf = None
+        self.gdf = read_cached_shapefile(shapefile_path, self._load, self.get_cache_params())
+    
+    def _load(self):
         self.prepare_data()
+        return self.gdf
+    
+    def get_cache_params(self):
+        """Parámetros que afectan a prepare_data (clave de la caché en disco)"""
+        return {}
     
     @abstractmethod
     def prepare_data(self):
@@ -1,5 +1,9 @@
 from abc import ABC, abstractmethod
 import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from utils.spatial_utils import read_cached_shapefile
 
 
 class Stop(ABC):
@@ -7,7 +11,16 @@ class Stop(ABC):
     def __init__(self, shapefile_path):
         self.shapefile_path = shapefile_path
         self.gdf = None
+        self.viewport = None
+        self.gdf = read_cached_shapefile(shapefile_path, self._load, self.get_cache_params())
+    
+    def _load(self):
         self.prepare_data()
+        return self.gdf
+    
+    def get_cache_params(self):
+        """Parámetros que afectan a prepare_data (clave de la caché en disco)"""
+        return {}
     
     @abstractmethod
     def prepare_data(self):
@@ -18,4 +31,23 @@ class Stop(ABC):
         pass
     
     def get_geodataframe(self):
-        return self.gdf
\ No newline at end of file
+        return self.gdf
+    
+    def set_viewport(self, bounds):
+        """Limita las paradas a dibujar a (min_lon, min_lat, max_lon, max_lat)"""
+        self.viewport = tuple(bounds) if bounds is not None else None
+    
+    @staticmethod
+    def text_column(gdf, column, default):
+        """Columna como texto con posiciones 0..n-1 (default si falta o es nulo)"""
+        if column in gdf.columns:
+            return gdf[column].fillna(default).astype(str).reset_index(drop=True)
+        return pd.Series(default, index=pd.RangeIndex(len(gdf)), dtype=object)
+    
+    def get_visible_geodataframe(self):
+        """Paradas dentro del viewport, consultadas con el índice espacial"""
+        if self.gdf is None or self.viewport is None or len(self.gdf) == 0:
+            return self.gdf
+        
+        idx = self.gdf.sindex.query(shapely.box(*self.viewport), predicate='intersects')
+        return self.gdf.iloc[np.sort(idx)]
\ No newline at end of file
@@ -6,20 +6,22 @@ from .bus_map import BusMap
 
 class BusFactory(RoadAxisFactory):
     
-    def __init__(self, route_shapefile, stop_shapefile, system_name="Buses", max_routes=50, max_stops=1000):
+    def __init__(self, route_shapefile, stop_shapefile, system_name="Buses", max_routes=50, max_stops=1000, route_code='Código_Ru', bbox=None, cluster_stops=False):
         self.route_shapefile = route_shapefile
         self.stop_shapefile = stop_shapefile
         self.system_name = system_name
         self.max_routes = max_routes
         self.max_stops = max_stops
+        self.route_code = route_code
+        self.bbox = bbox
+        self.cluster_stops = cluster_stops
     
     def create_route(self) -> BusRoute:
-        return BusRoute(self.route_shapefile, self.max_routes)
+        return BusRoute(self.route_shapefile, self.max_routes, self.route_code, bbox=self.bbox)
     
     def create_stop(self) -> BusStop:
-        return BusStop(self.stop_shapefile, self.max_stops)
+        return BusStop(self.stop_shapefile, self.max_stops, bbox=self.bbox, cluster=self.cluster_stops)
     
     def create_map(self) -> BusMap:
-        route = self.create_route()
-        stop = self.create_stop()
+        route, stop = self.create_route_and_stop()
         return BusMap(route, stop, self.system_name)
\ No newline at end of file
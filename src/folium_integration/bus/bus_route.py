@@ -1,34 +1,78 @@
+import logging
+
 import folium
 import geopandas as gpd
-import numpy as np
+from utils.spatial_utils import read_shapefile, reproject, simplify_geometries
 from ..abstract.route import Route
 
+logger = logging.getLogger(__name__)
+
+# Tolerancia de simplificación en metros (se aplica en el CRS proyectado)
+SIMPLIFY_TOLERANCE_M = 5
+
+
+# Paletas tab20 y tab20b de matplotlib en hexadecimal (evita importar matplotlib)
+_TAB20_HEX = (
+    '#1f77b4', '#aec7e8', '#ff7f0e', '#ffbb78', '#2ca02c', '#98df8a', '#d62728',
+    '#ff9896', '#9467bd', '#c5b0d5', '#8c564b', '#c49c94', '#e377c2', '#f7b6d2',
+    '#7f7f7f', '#c7c7c7', '#bcbd22', '#dbdb8d', '#17becf', '#9edae5'
+)
+_TAB20B_HEX = (
+    '#393b79', '#5254a3', '#6b6ecf', '#9c9ede', '#637939', '#8ca252', '#b5cf6b',
+    '#cedb9c', '#8c6d31', '#bd9e39', '#e7ba52', '#e7cb94', '#843c39', '#ad494a',
+    '#d6616b', '#e7969c', '#7b4173', '#a55194', '#ce6dbd', '#de9ed6'
+)
+_ROUTE_PALETTE = _TAB20_HEX + _TAB20B_HEX
+
+
+def _bus_route_style(feature):
+    return {
+        'color': feature['properties']['_color'],
+        'weight': 2.5,
+        'opacity': 0.7
+    }
+
 
 class BusRoute(Route):
     
-    def __init__(self, shapefile_path, max_routes=None):
+    def __init__(self, shapefile_path, max_routes=None, route_code='Código_Ru', bbox=None):
         self.max_routes = max_routes
+        self.route_code = route_code
+        self.bbox = bbox
         self.color_map = {}
         super().__init__(shapefile_path)
+        
+        # Al cargar desde caché el mapa de colores se recupera de la columna
+        if not self.color_map and self.gdf is not None and '_color' in self.gdf.columns:
+            self.color_map = dict(zip(self.gdf[self.route_code], self.gdf['_color']))
+    
+    def get_cache_params(self):
+        return {'max_routes': self.max_routes, 'route_code': self.route_code, 'bbox': self.bbox}
     
     def prepare_data(self):
         try:
-            self.gdf = gpd.read_file(self.shapefile_path)
+            self.gdf = read_shapefile(self.shapefile_path, columns=[self.route_code], bbox=self.bbox)
             
-            # Reproyectar a WGS84
             if self.gdf.crs is None:
                 self.gdf = self.gdf.set_crs("EPSG:32717", allow_override=True)
-            if self.gdf.crs.to_string() != "EPSG:4326":
-                self.gdf = self.gdf.to_crs("EPSG:4326")
             
             # Limitar número de rutas si se especifica
             if self.max_routes:
                 self.gdf = self.gdf.head(self.max_routes)
             
-            # Generar mapa de colores
+            # Simplificar en metros antes de reproyectar
+            if self.gdf.crs.is_projected:
+                self.gdf = simplify_geometries(self.gdf, tolerance=SIMPLIFY_TOLERANCE_M)
+            
+            # Reproyectar a WGS84
+            if self.gdf.crs.to_string() != "EPSG:4326":
+                self.gdf = reproject(self.gdf, "EPSG:4326")
+            
+            # Generar mapa de colores y guardarlo como columna
             self._generate_color_map()
+            self.gdf['_color'] = self.gdf[self.route_code].map(self.color_map).fillna('#3388ff')
             
-            print(f"✓ Rutas de Buses cargadas: {len(self.gdf)}")
+            logger.debug("Rutas de Buses cargadas: %d", len(self.gdf))
             
         except Exception as e:
             print(f"Error preparando rutas de Buses: {e}")
@@ -38,63 +82,35 @@ class BusRoute(Route):
         if self.gdf is None:
             return
         
-        codigos_rutas = self.gdf['Código_Ru'].unique()
+        codigos_rutas = self.gdf[self.route_code].unique()
         n = len(codigos_rutas)
         
-        np.random.seed(42)
         colores = self._generar_colores(n)
-        self.color_map = {codigo: color for codigo, color in zip(codigos_rutas, colores)}
+        self.color_map = dict(zip(codigos_rutas, colores))
     
     @staticmethod
     def _generar_colores(n):
-        """Genera n colores distintos en formato hexadecimal para cada ruta"""
-        import matplotlib.pyplot as plt
-        
-        if n <= 20:
-            cmap = plt.cm.tab20
-            colores = [cmap(i) for i in np.linspace(0, 1, n)]
-        else:
-            cmap1 = plt.cm.tab20
-            cmap2 = plt.cm.tab20b
-            n1 = min(n, 20)
-            n2 = n - n1
-            colores1 = [cmap1(i) for i in np.linspace(0, 1, n1)]
-            colores2 = [cmap2(i) for i in np.linspace(0, 1, n2)]
-            colores = colores1 + colores2
-        
-        colores_hex = []
-        for color in colores:
-            r, g, b = int(color[0]*255), int(color[1]*255), int(color[2]*255)
-            colores_hex.append(f'#{r:02x}{g:02x}{b:02x}')
-        
-        return colores_hex
+        """Genera n colores en formato hexadecimal para cada ruta, ciclando la paleta"""
+        return list(_ROUTE_PALETTE * (n // len(_ROUTE_PALETTE) + 1))[:n]
     
     def add_to_map(self, feature_group):
         if self.gdf is None or len(self.gdf) == 0:
             return
         
         try:
-            for idx, row in self.gdf.iterrows():
-                codigo = row['Código_Ru']
-                color = self.color_map.get(codigo, '#3388ff')
-                
-                popup_html = f"""
-                <div style="font-family: Arial;">
-                    <h4 style="margin: 0;"> Ruta {codigo}</h4>
-                </div>
-                """
-                
-                geo_json = folium.GeoJson(
-                    row.geometry.__geo_interface__,
-                    style_function=lambda x, c=color: {
-                        'color': c,
-                        'weight': 2.5,
-                        'opacity': 0.7
-                    },
-                    tooltip=f'Ruta {codigo}',
-                    popup=folium.Popup(popup_html, max_width=200)
-                )
-                geo_json.add_to(feature_group)
+            route_code = self.route_code
+            
+            # Serializar una sola vez a FeatureCollection (folium solo la parsea)
+            geojson_str = self.gdf[[route_code, '_color', 'geometry']].to_json()
+            
+            # Un solo GeoJson con todas las rutas
+            geo_json = folium.GeoJson(
+                geojson_str,
+                style_function=_bus_route_style,
+                tooltip=folium.GeoJsonTooltip(fields=[route_code], aliases=['Ruta']),
+                popup=folium.GeoJsonPopup(fields=[route_code], aliases=['Ruta'], max_width=200)
+            )
+            geo_json.add_to(feature_group)
                 
         except Exception as e:
-            print(f"Error agregando rutas al mapa: {e}")
\ No newline at end of file
+            print(f"Error agregando rutas al mapa: {e}")
@@ -1,26 +1,76 @@
+import logging
+
 import folium
+from folium.plugins import FastMarkerCluster
 import geopandas as gpd
 import numpy as np
+import shapely
+from utils.spatial_utils import coords_in_bounds, read_shapefile, reproject
 from ..abstract.stop import Stop
 
+logger = logging.getLogger(__name__)
+
+# Atributos usados en los popups (el resto no se lee del shapefile)
+STOP_COLUMNS = ['PRINCIPAL', 'SECUNDARIA']
+
+# Rango válido de paradas en el CRS original (SIRES-DMQ): minx, miny, maxx, maxy
+SOURCE_BOUNDS = (480000, 9960000, 520000, 10000000)
+
+# Rangos válidos en WGS84 (lon/lat) tras reproyectar y al dibujar
+WGS84_BOUNDS = (-79, -0.5, -78, 0.1)
+MAP_BOUNDS = (-79, -1, -78, 1)
+
+# Estilo común de todos los marcadores de parada
+_STOP_STYLE = dict(radius=4, color='#FF6B35', fill=True, fillColor='#FF6B35', fillOpacity=0.7, weight=1)
+
+# Crea en el navegador el mismo CircleMarker que add_to_map; row = [lat, lon, popup, tooltip]
+_STOP_CLUSTER_CALLBACK = """function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+        radius: 4, color: '#FF6B35', fillColor: '#FF6B35', fillOpacity: 0.7, weight: 1
+    });
+    marker.bindPopup(row[2], {maxWidth: 250});
+    marker.bindTooltip(row[3]);
+    return marker;
+}"""
+
+
+def _point_coords(geoms, mask):
+    """Coordenadas x, y de los puntos seleccionados por `mask` (NaN en el resto)"""
+    x = np.full(len(geoms), np.nan)
+    y = np.full(len(geoms), np.nan)
+    x[mask] = shapely.get_x(geoms[mask])
+    y[mask] = shapely.get_y(geoms[mask])
+    return x, y
+
 
 class BusStop(Stop):
     
-    def __init__(self, shapefile_path, max_stops=1000):
+    def __init__(self, shapefile_path, max_stops=1000, bbox=None, cluster=False):
         self.max_stops = max_stops
+        self.bbox = bbox
+        self.cluster = cluster
         super().__init__(shapefile_path)
     
+    def get_cache_params(self):
+        return {'bbox': self.bbox}
+    
     def prepare_data(self):
         try:
-            self.gdf = gpd.read_file(self.shapefile_path)
+            if self.bbox is not None:
+                self.gdf = read_shapefile(self.shapefile_path, columns=STOP_COLUMNS, bbox=self.bbox)
+            else:
+                # Sin bbox de ciudad, filtrar en GDAL con el rango de _clean_stops
+                self.gdf = read_shapefile(
+                    self.shapefile_path, columns=STOP_COLUMNS, bbox=SOURCE_BOUNDS, bbox_crs=None
+                )
             
-            print(f"  Paradas originales: {len(self.gdf)}")
+            logger.debug("Paradas originales: %d", len(self.gdf))
             
             # Limpiar datos inválidos
             self.gdf = self._clean_stops()
             
             if len(self.gdf) == 0:
-                print("No hay paradas válidas después de la limpieza")
+                logger.debug("No hay paradas válidas después de la limpieza")
                 return
             
             # Reproyectar a WGS84
@@ -28,16 +78,12 @@ class BusStop(Stop):
                 self.gdf = self.gdf.set_crs("EPSG:32717", allow_override=True)
             
             if self.gdf.crs.to_string() != "EPSG:4326":
-                self.gdf = self.gdf.to_crs("EPSG:4326")
+                self.gdf = reproject(self.gdf, "EPSG:4326")
             
             # Verificar validez después de reproyección
             self.gdf = self._validate_coordinates()
             
-            # Limitar número de paradas
-            if len(self.gdf) > self.max_stops:
-                self.gdf = self.gdf.head(self.max_stops)
-            
-            print(f"✓ Paradas de Buses cargadas: {len(self.gdf)}")
+            logger.debug("Paradas de Buses cargadas: %d", len(self.gdf))
             
         except Exception as e:
             print(f"Error preparando paradas de Buses: {e}")
@@ -46,89 +92,68 @@ class BusStop(Stop):
             self.gdf = None
     
     def _clean_stops(self):
-        gdf = self.gdf.copy()
+        # La indexación booleana ya produce un frame nuevo; no hace falta copiar antes
+        geoms = np.asarray(self.gdf.geometry.values)
         
-        # Eliminar geometrías vacías o inválidas
-        gdf = gdf[~gdf.geometry.is_empty]
-        gdf = gdf[gdf.geometry.is_valid]
+        # Geometrías no vacías y válidas
+        valid = ~shapely.is_empty(geoms) & shapely.is_valid(geoms)
+        x, y = _point_coords(geoms, valid)
         
         # Filtrar por rangos válidos en CRS original (SIRES-DMQ)
-        x_min, x_max = 480000, 520000
-        y_min, y_max = 9960000, 10000000
-        
-        gdf = gdf[
-            (gdf.geometry.x > x_min) & 
-            (gdf.geometry.x < x_max) &
-            (gdf.geometry.y > y_min) & 
-            (gdf.geometry.y < y_max)
-        ]
-        
-        return gdf
+        return self.gdf[valid & coords_in_bounds(x, y, SOURCE_BOUNDS)]
     
     def _validate_coordinates(self):
-        gdf = self.gdf.copy()
-        
-        # Filtro adicional por coordenadas en WGS84
-        gdf = gdf[
-            (gdf.geometry.x > -79) & 
-            (gdf.geometry.x < -78) &
-            (gdf.geometry.y > -0.5) & 
-            (gdf.geometry.y < 0.1)
-        ]
-        
-        # Eliminar valores infinitos o NaN
-        gdf = gdf[~gdf.geometry.x.isin([np.inf, -np.inf, np.nan])]
-        gdf = gdf[~gdf.geometry.y.isin([np.inf, -np.inf, np.nan])]
+        geoms = np.asarray(self.gdf.geometry.values)
+        x, y = _point_coords(geoms, ~shapely.is_empty(geoms))
         
-        return gdf
+        # Filtro adicional por coordenadas en WGS84, descartando infinitos o NaN
+        return self.gdf[coords_in_bounds(x, y, WGS84_BOUNDS)]
     
     def add_to_map(self, feature_group):
-        if self.gdf is None or len(self.gdf) == 0:
+        # Recortar al viewport; con clustering se dibujan todas las paradas visibles
+        gdf = self.get_visible_geodataframe()
+        if gdf is None or len(gdf) == 0:
             return
         
+        if not self.cluster and len(gdf) > self.max_stops:
+            gdf = gdf.head(self.max_stops)
+        
         try:
-            contador_exitoso = 0
+            geoms = np.asarray(gdf.geometry.values)
+            lons, lats = _point_coords(geoms, ~shapely.is_empty(geoms))
+            
+            # Validación adicional en una sola máscara
+            valid = coords_in_bounds(lons, lats, MAP_BOUNDS)
+            
+            principales = self.text_column(gdf, 'PRINCIPAL', 'Sin nombre')[valid]
+            secundarias = self.text_column(gdf, 'SECUNDARIA', '')[valid]
+            lats, lons = lats[valid], lons[valid]
+            
+            # HTML de popups y tooltips armados por columna
+            popups = (
+                '<div style="font-family: Arial; width: 220px;">'
+                '<h4 style="margin: 0; color: #FF6B35;"> Parada</h4>'
+                '<p style="margin: 5px 0;"><b>Principal:</b> ' + principales + '</p>'
+                '<p style="margin: 5px 0;"><b>Secundaria:</b> ' + secundarias + '</p>'
+                '</div>'
+            ).to_numpy()
+            tooltips = principales.str.slice(0, 50).to_numpy()
             
-            for idx, row in self.gdf.iterrows():
-                try:
-                    lat, lon = row.geometry.y, row.geometry.x
-                    
-                    # Validación adicional
-                    if np.isnan(lat) or np.isnan(lon) or np.isinf(lat) or np.isinf(lon):
-                        continue
-                    
-                    if not (-1 < lat < 1 and -79 < lon < -78):
-                        continue
-                    
-                    principal = row.get('PRINCIPAL', 'Sin nombre')
-                    secundaria = row.get('SECUNDARIA', '')
-                    
-                    popup_html = f"""
-                    <div style="font-family: Arial; width: 220px;">
-                        <h4 style="margin: 0; color: #FF6B35;"> Parada</h4>
-                        <p style="margin: 5px 0;"><b>Principal:</b> {principal}</p>
-                        <p style="margin: 5px 0;"><b>Secundaria:</b> {secundaria}</p>
-                    </div>
-                    """
-                    
+            if self.cluster:
+                # Un solo arreglo JSON; los marcadores se crean en el navegador por cluster
+                data = [list(row) for row in zip(lats.tolist(), lons.tolist(), popups.tolist(), tooltips.tolist())]
+                FastMarkerCluster(data, callback=_STOP_CLUSTER_CALLBACK).add_to(feature_group)
+            else:
+                # Folium no permite compartir un Popup entre marcadores: uno por parada
+                for lat, lon, popup_html, tooltip in zip(lats.tolist(), lons.tolist(), popups, tooltips):
                     folium.CircleMarker(
                         location=[lat, lon],
-                        radius=4,
                         popup=folium.Popup(popup_html, max_width=250),
-                        tooltip=str(principal)[:50],
-                        color='#FF6B35',
-                        fill=True,
-                        fillColor='#FF6B35',
-                        fillOpacity=0.7,
-                        weight=1
+                        tooltip=tooltip,
+                        **_STOP_STYLE
                     ).add_to(feature_group)
-                    
-                    contador_exitoso += 1
-                    
-                except Exception:
-                    continue
             
-            print(f"  ✓ {contador_exitoso} paradas agregadas al mapa")
+            print(f"  ✓ {len(lats)} paradas agregadas al mapa")
             
         except Exception as e:
             print(f"Error agregando paradas de Bus al mapa: {e}")
\ No newline at end of file
@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from .abstract.road_axis_factory import RoadAxisFactory
 
 
@@ -5,20 +7,52 @@ class CityTransportIntegration:
     
     def __init__(self):
         self.transport_systems = []
+        self._bounds_cache = None
     
     def add_transport_system(self, factory: RoadAxisFactory):
         try:
             transport_map = factory.create_map()
             self.transport_systems.append(transport_map)
+            self._bounds_cache = None
             print(f"✓ Sistema '{transport_map.system_name}' agregado")
         except Exception as e:
             print(f"Error agregando sistema de transporte: {e}")
     
-    def add_layers_to_map(self, folium_map):
+    def add_transport_systems(self, factories):
+        """Crea los mapas de varios sistemas en paralelo, conservando el orden"""
+        factories = list(factories)
+        if not factories:
+            return
+        
+        with ThreadPoolExecutor(max_workers=len(factories)) as executor:
+            futures = [executor.submit(factory.create_map) for factory in factories]
+        
+        for future in futures:
+            try:
+                transport_map = future.result()
+                self.transport_systems.append(transport_map)
+                self._bounds_cache = None
+                print(f"✓ Sistema '{transport_map.system_name}' agregado")
+            except Exception as e:
+                print(f"Error agregando sistema de transporte: {e}")
+    
+    def add_layers_to_map(self, folium_map, bounds=None):
+        """
+        Agrega las capas de todos los sistemas al mapa
+        
+        Args:
+            folium_map: Mapa de Folium
+            bounds: (min_lon, min_lat, max_lon, max_lat) para recortar las paradas;
+                    por defecto los límites combinados de los sistemas
+        """
         print("\n=== Agregando capas de transporte al mapa ===")
         
+        if bounds is None:
+            bounds = self.get_all_bounds()
+        
         for transport_map in self.transport_systems:
             try:
+                transport_map.stop.set_viewport(bounds)
                 layers = transport_map.create_layers()
                 for layer in layers:
                     layer.add_to(folium_map)
@@ -31,38 +65,34 @@ class CityTransportIntegration:
         """Obtiene los límites geográficos combinados de todos los sistemas"""
         import numpy as np
         
-        min_lon, min_lat = float('inf'), float('inf')
-        max_lon, max_lat = float('-inf'), float('-inf')
+        # Solo cambian al agregar un sistema de transporte
+        if self._bounds_cache is not None:
+            return list(self._bounds_cache)
         
+        # total_bounds de rutas y paradas como filas de una matriz (N, 4)
+        all_bounds = []
         for transport_map in self.transport_systems:
             try:
-                # Obtener bounds de rutas
-                route_gdf = transport_map.route.get_geodataframe()
-                if route_gdf is not None and len(route_gdf) > 0:
-                    bounds = route_gdf.total_bounds
-                    if not np.any(np.isinf(bounds)) and not np.any(np.isnan(bounds)):
-                        min_lon = min(min_lon, bounds[0])
-                        min_lat = min(min_lat, bounds[1])
-                        max_lon = max(max_lon, bounds[2])
-                        max_lat = max(max_lat, bounds[3])
-                
-                # Obtener bounds de paradas
-                stop_gdf = transport_map.stop.get_geodataframe()
-                if stop_gdf is not None and len(stop_gdf) > 0:
-                    bounds = stop_gdf.total_bounds
-                    if not np.any(np.isinf(bounds)) and not np.any(np.isnan(bounds)):
-                        min_lon = min(min_lon, bounds[0])
-                        min_lat = min(min_lat, bounds[1])
-                        max_lon = max(max_lon, bounds[2])
-                        max_lat = max(max_lat, bounds[3])
-                        
+                for gdf in (transport_map.route.get_geodataframe(), transport_map.stop.get_geodataframe()):
+                    if gdf is not None and len(gdf) > 0:
+                        all_bounds.append(gdf.total_bounds)
             except Exception as e:
                 print(f"Error obteniendo bounds de {transport_map.system_name}: {e}")
         
-        if np.isinf(min_lon) or np.isinf(min_lat):
+        if not all_bounds:
             return None
         
-        return [min_lon, min_lat, max_lon, max_lat]
+        # Descartar límites no finitos (inf o NaN) y reducir en una sola pasada
+        bounds = np.array(all_bounds, dtype=np.float64)
+        valid = np.isfinite(bounds).all(axis=1)
+        if not valid.any():
+            return None
+        
+        mins = bounds[valid, :2].min(axis=0)
+        maxs = bounds[valid, 2:].max(axis=0)
+        
+        self._bounds_cache = mins.tolist() + maxs.tolist()
+        return list(self._bounds_cache)
     
     def get_center(self):
         """Calcula el centro geográfico de todos los sistemas de transporte"""
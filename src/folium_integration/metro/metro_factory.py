@@ -6,18 +6,18 @@ from .metro_map import MetroMap
 
 class MetroFactory(RoadAxisFactory):
     
-    def __init__(self, route_shapefile, stop_shapefile, system_name="Metro"):
+    def __init__(self, route_shapefile, stop_shapefile, system_name="Metro", bbox=None):
         self.route_shapefile = route_shapefile
         self.stop_shapefile = stop_shapefile
         self.system_name = system_name
+        self.bbox = bbox
     
     def create_route(self) -> MetroLine:
-        return MetroLine(self.route_shapefile)
+        return MetroLine(self.route_shapefile, bbox=self.bbox)
     
     def create_stop(self) -> MetroStation:
-        return MetroStation(self.stop_shapefile)
+        return MetroStation(self.stop_shapefile, bbox=self.bbox)
     
     def create_map(self) -> MetroMap:
-        route = self.create_route()
-        stop = self.create_stop()
+        route, stop = self.create_route_and_stop()
         return MetroMap(route, stop, self.system_name)
\ No newline at end of file
@@ -1,18 +1,37 @@
 import folium
 import geopandas as gpd
+from utils.spatial_utils import read_shapefile, reproject
 from ..abstract.route import Route
 
+_METRO_LINE_STYLE = {
+    'color': '#E63946',
+    'weight': 4,
+    'opacity': 0.9
+}
+
+
+def _metro_line_style(feature):
+    return _METRO_LINE_STYLE
+
+
 class MetroLine(Route):
     
+    def __init__(self, shapefile_path, bbox=None):
+        self.bbox = bbox
+        super().__init__(shapefile_path)
+    
+    def get_cache_params(self):
+        return {'bbox': self.bbox}
+    
     def prepare_data(self):
         try:
-            self.gdf = gpd.read_file(self.shapefile_path)
+            self.gdf = read_shapefile(self.shapefile_path, columns=[], bbox=self.bbox)
             
             # Reproyectar a WGS84 para Folium
             if self.gdf.crs is None:
                 self.gdf = self.gdf.set_crs("EPSG:4326", allow_override=True)
             if self.gdf.crs.to_string() != "EPSG:4326":
-                self.gdf = self.gdf.to_crs("EPSG:4326")
+                self.gdf = reproject(self.gdf, "EPSG:4326")
             
             print(f"✓ Línea de Metro cargada: {len(self.gdf)} geometrías")
             
@@ -25,17 +44,13 @@ class MetroLine(Route):
             return
         
         try:
-            for idx, row in self.gdf.iterrows():
-                geo_json = folium.GeoJson(
-                    row.geometry.__geo_interface__,
-                    style_function=lambda x: {
-                        'color': '#E63946',
-                        'weight': 4,
-                        'opacity': 0.9
-                    },
-                    tooltip='Línea de Metro'
-                )
-                geo_json.add_to(feature_group)
+            # Un solo GeoJson (FeatureCollection) con todas las geometrías
+            geo_json = folium.GeoJson(
+                self.gdf[['geometry']].to_json(),
+                style_function=_metro_line_style,
+                tooltip='Línea de Metro'
+            )
+            geo_json.add_to(feature_group)
                 
         except Exception as e:
             print(f"Error agregando ruta de Metro al mapa: {e}")
\ No newline at end of file
@@ -1,19 +1,42 @@
 import folium
 import geopandas as gpd
+import numpy as np
+import shapely
+from utils.spatial_utils import read_shapefile, reproject
 from ..abstract.stop import Stop
 
+# Atributos usados en los popups (el resto no se lee del shapefile)
+STATION_COLUMNS = ['nam', 'direccion']
+
+# Estilo común de todos los marcadores de estación
+_STATION_STYLE = dict(radius=8, color='#E63946', fill=True, fillColor='white', fillOpacity=1, weight=3)
+
 
 class MetroStation(Stop):
     
+    def __init__(self, shapefile_path, bbox=None):
+        self.bbox = bbox
+        super().__init__(shapefile_path)
+    
+    def get_cache_params(self):
+        return {'bbox': self.bbox, 'geometry': 'centroid'}
+    
     def prepare_data(self):
         try:
-            self.gdf = gpd.read_file(self.shapefile_path)
+            self.gdf = read_shapefile(self.shapefile_path, columns=STATION_COLUMNS, bbox=self.bbox)
             
             # Reproyectar a WGS84
             if self.gdf.crs is None:
                 self.gdf = self.gdf.set_crs("EPSG:4326", allow_override=True)
             if self.gdf.crs.to_string() != "EPSG:4326":
-                self.gdf = self.gdf.to_crs("EPSG:4326")
+                self.gdf = reproject(self.gdf, "EPSG:4326")
+            
+            # Una estación se dibuja en su centroide: calcularlo una vez aquí (queda en la caché)
+            self.gdf = gpd.GeoDataFrame(
+                self.gdf.drop(columns=self.gdf.geometry.name),
+                geometry=shapely.centroid(np.asarray(self.gdf.geometry.values)),
+                crs=self.gdf.crs
+            )
             
             print(f"✓ Estaciones de Metro cargadas: {len(self.gdf)}")
             
@@ -22,38 +45,33 @@ class MetroStation(Stop):
             self.gdf = None
     
     def add_to_map(self, feature_group):
-        if self.gdf is None or len(self.gdf) == 0:
+        gdf = self.get_visible_geodataframe()
+        if gdf is None or len(gdf) == 0:
             return
         
         try:
-            for idx, row in self.gdf.iterrows():
-                # Obtener centroide si es polígono
-                if row.geometry.geom_type == 'Polygon':
-                    centroid = row.geometry.centroid
-                    lat, lon = centroid.y, centroid.x
-                else:
-                    lat, lon = row.geometry.y, row.geometry.x
-                
-                nombre = row.get('nam', 'Estación')
-                direccion = row.get('direccion', 'Sin dirección')
-                
-                popup_html = f"""
-                <div style="font-family: Arial; width: 200px;">
-                    <h4 style="margin: 0; color: #E63946;"> {nombre}</h4>
-                    <p style="margin: 5px 0;"><b>Dirección:</b> {direccion}</p>
-                </div>
-                """
-                
+            # Geometrías ya reducidas a su centroide en prepare_data
+            points = np.asarray(gdf.geometry.values)
+            lats = shapely.get_y(points)
+            lons = shapely.get_x(points)
+            
+            nombres = self.text_column(gdf, 'nam', 'Estación')
+            direcciones = self.text_column(gdf, 'direccion', 'Sin dirección')
+            
+            # HTML de popups armado por columna
+            popups = (
+                '<div style="font-family: Arial; width: 200px;">'
+                '<h4 style="margin: 0; color: #E63946;"> ' + nombres + '</h4>'
+                '<p style="margin: 5px 0;"><b>Dirección:</b> ' + direcciones + '</p>'
+                '</div>'
+            ).to_numpy()
+            
+            for lat, lon, nombre, popup_html in zip(lats.tolist(), lons.tolist(), nombres.to_numpy(), popups):
                 folium.CircleMarker(
                     location=[lat, lon],
-                    radius=8,
                     popup=folium.Popup(popup_html, max_width=250),
                     tooltip=nombre,
-                    color='#E63946',
-                    fill=True,
-                    fillColor='white',
-                    fillOpacity=1,
-                    weight=3
+                    **_STATION_STYLE
                 ).add_to(feature_group)
                 
         except Exception as e:
@@ -53,14 +53,23 @@ class RecommendationSystem:
         
         # Registrar observers
         self.map_state.attach(self.rec_observer)
-        self.map_state.attach(self.cache_observer)
+        self.map_state.attach(self.cache_observer, CacheObserver.INVALIDATING_CHANGES)
         
-        # Analizar distritos (con caché)
-        self.metrics_df = self.analyzer.analyze_all_districts(force_refresh=False)
+        # Los distritos se analizan (con caché) al pedir las métricas por primera vez
+        self._metrics_df = None
         
-        print(f"   Distritos: {len(self.metrics_df)}")
         print(f"   Estrategias: {len(self.strategies)}")
     
+    @property
+    def metrics_df(self) -> pd.DataFrame:
+        return self._ensure_metrics()
+    
+    def _ensure_metrics(self) -> pd.DataFrame:
+        # Analiza los distritos (con caché) solo la primera vez
+        if self._metrics_df is None:
+            self._metrics_df = self.analyzer.analyze_all_districts(force_refresh=False)
+        return self._metrics_df
+    
     def set_strategy(self, strategy_name: str) -> bool:
         """
         Cambia la estrategia de análisis.
@@ -77,6 +86,9 @@ class RecommendationSystem:
             print(f"Estrategia '{strategy_name}' no existe. Disponibles: {available}")
             return False
         
+        # El observer calcula los scores sobre las métricas del analyzer
+        self._ensure_metrics()
+        
         strategy = self.strategies[strategy_name]
         self.map_state.set_strategy(strategy)
         self.current_strategy_name = strategy_name
@@ -120,7 +132,7 @@ class RecommendationSystem:
         self.analyzer.invalidate_cache()
     
     def refresh_analysis(self):
-        self.metrics_df = self.analyzer.analyze_all_districts(force_refresh=True)
+        self._metrics_df = self.analyzer.analyze_all_districts(force_refresh=True)
         
         # Re-calcular scores si hay estrategia activa
         if self.current_strategy_name:
@@ -1,28 +1,45 @@
 import folium
-from .map_layer import MapLayer
+from .map_layer import MapLayer, POLYGON_SMOOTH_FACTOR
+
+# Estilo común a todos los distritos (una sola función para toda la capa)
+_DISTRICT_STYLE = {
+    'fillColor': 'red',
+    'color': 'red',
+    'weight': 2,
+    'fillOpacity': 0.1
+}
+
+
+def _district_style(feature):
+    return _DISTRICT_STYLE
 
 
 class DistrictLayer(MapLayer):
     
     def _build_layer(self):
-        graph = self.citygraph.get_graph()
+        graph = self.citygraph.get_render_graph()
         
         if graph is None:
             return
         
-        for idx, row in graph.iterrows():
-            geojson = folium.GeoJson(
-                row.geometry.__geo_interface__,
-                style_function=lambda x: {
-                    'fillColor': 'red',
-                    'color': 'red',
-                    'weight': 2,
-                    'fillOpacity': 0.1
-                },
-                popup=row.get('display_name', 'N/A'),
-                tooltip=row.get('display_name', 'Distrito')
-            )
-            self.elements.append(geojson)
+        # Un solo GeoJson con todos los distritos (una FeatureCollection)
+        if 'display_name' in graph.columns:
+            districts = graph[['display_name', 'geometry']]
+            popup = folium.GeoJsonPopup(fields=['display_name'], labels=False)
+            tooltip = folium.GeoJsonTooltip(fields=['display_name'], labels=False)
+        else:
+            districts = graph[['geometry']]
+            popup = None
+            tooltip = 'Distrito'
+        
+        geojson = folium.GeoJson(
+            districts,
+            style_function=_district_style,
+            smooth_factor=POLYGON_SMOOTH_FACTOR,
+            popup=popup,
+            tooltip=tooltip
+        )
+        self.elements.append(geojson)
     
     def get_layer_name(self):
-        return " Distritos"
\ No newline at end of file
+        return " Distritos"
@@ -1,5 +1,9 @@
 from abc import ABC, abstractmethod
 
+# Leaflet simplifica los polígonos en cada nivel de zoom (default 1.0):
+# menos vértices que redibujar al mover o hacer zoom
+POLYGON_SMOOTH_FACTOR = 2.0
+
 
 class MapLayer(ABC):
     
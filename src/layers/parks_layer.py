@@ -1,44 +1,62 @@
 import folium
-from .map_layer import MapLayer
+import shapely
+from .map_layer import MapLayer, POLYGON_SMOOTH_FACTOR
+
+# Estilo común a todos los polígonos de parques
+_PARK_POLYGON_STYLE = {
+    'fillColor': '#2E8B57',
+    'color': '#228B22',
+    'weight': 1,
+    'fillOpacity': 0.6
+}
+
+
+def _park_polygon_style(feature):
+    return _PARK_POLYGON_STYLE
 
 
 class ParksLayer(MapLayer):
     
     def _build_layer(self):
-        parks = self.citygraph.get_parks()
+        parks = self.citygraph.get_render_parks()
         
         if parks is None:
             return
         
-        for idx, row in parks.iterrows():
-            geom = row.geometry
-            popup_text = row.get('name', 'Parque')
+        parks = parks[parks.geometry.notna()]
+        names = (
+            parks['name'].fillna('Parque').astype(str)
+            if 'name' in parks.columns else 'Parque'
+        )
+        parks = parks[['geometry']].assign(name=names)
+        is_point = (parks.geometry.geom_type == 'Point').to_numpy()
+        
+        points = parks[is_point]
+        lats = shapely.get_y(points.geometry.values)
+        lons = shapely.get_x(points.geometry.values)
+        for lat, lon, popup_text in zip(lats, lons, points['name'].to_numpy()):
+            # Crear marcador para punto
+            icon = folium.Icon(color='green', icon='tree', prefix='fa')
             
-            if geom.geom_type == 'Point':
-                # Crear marcador para punto
-                icon = folium.Icon(color='green', icon='tree', prefix='fa')
-                
-                marker = folium.Marker(
-                    location=[geom.y, geom.x],
-                    icon=icon,
-                    popup=popup_text,
-                    tooltip="Ver parque"
-                )
-                self.elements.append(marker)
-            else:
-                # Crear GeoJson para polígonos
-                geojson = folium.GeoJson(
-                    geom.__geo_interface__,
-                    style_function=lambda x: {
-                        'fillColor': '#2E8B57',  
-                        'color': '#228B22',      
-                        'weight': 1,
-                        'fillOpacity': 0.6
-                    },
-                    popup=popup_text,
-                    tooltip=popup_text
-                )
-                self.elements.append(geojson)
+            marker = folium.Marker(
+                location=[lat, lon],
+                icon=icon,
+                popup=popup_text,
+                tooltip="Ver parque"
+            )
+            self.elements.append(marker)
+        
+        # Un solo GeoJson con todos los polígonos
+        polygons = parks[~is_point]
+        if len(polygons) > 0:
+            geojson = folium.GeoJson(
+                polygons,
+                style_function=_park_polygon_style,
+                smooth_factor=POLYGON_SMOOTH_FACTOR,
+                popup=folium.GeoJsonPopup(fields=['name'], labels=False),
+                tooltip=folium.GeoJsonTooltip(fields=['name'], labels=False)
+            )
+            self.elements.append(geojson)
     
     def get_layer_name(self):
-        return " Parques"
\ No newline at end of file
+        return " Parques"
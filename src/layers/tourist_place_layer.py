@@ -1,76 +1,96 @@
 import folium
-from .map_layer import MapLayer
+import numpy as np
+import shapely
+from .map_layer import MapLayer, POLYGON_SMOOTH_FACTOR
+
+
+def _tourist_place_style(feature):
+    """Estilo leído de las propiedades precalculadas de cada lugar"""
+    properties = feature['properties']
+    return {
+        'color': properties['color'],
+        'weight': properties['weight'],
+        'fillColor': properties['fill_color'],
+        'fillOpacity': properties['fill_opacity']
+    }
 
 
 class TouristPlaceLayer(MapLayer):
     
     def _build_layer(self):
-        gdf = self.citygraph.get_tourist_places()
+        gdf = self.citygraph.get_render_tourist_places()
         
         # Si no hay datos, no se crean elementos
         if gdf is None:
             return
         
-        for idx, row in gdf.iterrows():
-            # Ignorar registros sin geometría
-            if row.geometry is None:
-                continue
-            
-            # Nombre del lugar
-            name = row.get('name', 'Lugar turístico')
-            
-            # Verificar si es un centro comercial
-            is_mall = (
-                row.get('shop') == 'mall' or
-                row.get('amenity') == 'shopping_centre'
+        # Ignorar registros sin geometría
+        gdf = gdf[gdf.geometry.notna()]
+        if len(gdf) == 0:
+            return
+        
+        # Nombre del lugar
+        names = (
+            gdf['name'].fillna('Lugar turístico').astype(str)
+            if 'name' in gdf.columns else 'Lugar turístico'
+        )
+        
+        # Verificar si es un centro comercial
+        is_mall = np.zeros(len(gdf), dtype=bool)
+        if 'shop' in gdf.columns:
+            is_mall |= (gdf['shop'] == 'mall').to_numpy()
+        if 'amenity' in gdf.columns:
+            is_mall |= (gdf['amenity'] == 'shopping_centre').to_numpy()
+        
+        # Propiedades de estilo precalculadas según el tipo
+        places = gdf[['geometry']].assign(
+            name=names,
+            color=np.where(is_mall, '#ff1493', 'blue'),
+            fill_color=np.where(is_mall, '#ff69b4', 'blue'),
+            weight=np.where(is_mall, 3, 2),
+            fill_opacity=np.where(is_mall, 0.6, 0.4)
+        )
+        
+        try:
+            # Dibujar todas las geometrías en un solo GeoJson
+            geojson = folium.GeoJson(
+                places,
+                style_function=_tourist_place_style,
+                smooth_factor=POLYGON_SMOOTH_FACTOR,
+                tooltip=folium.GeoJsonTooltip(fields=['name'], labels=False),
+                popup=folium.GeoJsonPopup(fields=['name'], labels=False)
             )
-            
-            # Definir colores según el tipo
-            border_color = '#ff1493' if is_mall else 'blue'
-            fill_color = '#ff69b4' if is_mall else 'blue'
-            
+            self.elements.append(geojson)
+        except Exception as e:
+            print(f"Error creando capa de lugares turísticos: {e}")
+        
+        # Agregar marcador solo si es mall
+        malls = places[is_mall]
+        malls = malls[malls.geom_type.isin(['Polygon', 'MultiPolygon', 'Point']).to_numpy()]
+        
+        # Centro de cada objeto calculado en una sola pasada (el centroide de un punto es el mismo punto)
+        centers = shapely.centroid(malls.geometry.values)
+        lats = shapely.get_y(centers)
+        lons = shapely.get_x(centers)
+        
+        for lat, lon, name in zip(lats, lons, malls['name'].to_numpy()):
             try:
-                # Dibujar la geometría en el mapa
-                geojson = folium.GeoJson(
-                    row.geometry.__geo_interface__,
-                    style_function=lambda x, bc=border_color, fc=fill_color, im=is_mall: {
-                        'color': bc,
-                        'weight': 3 if im else 2,
-                        'fillColor': fc,
-                        'fillOpacity': 0.6 if im else 0.4
-                    },
-                    tooltip=name,
-                    popup=name
+                # Crear el marcador con icono
+                marker = folium.Marker(
+                    location=[lat, lon],
+                    tooltip=f"Centro comercial: {name}",
+                    popup=name,
+                    icon=folium.Icon(
+                        icon='shopping-cart',
+                        prefix='fa',
+                        color='red'
+                    )
                 )
-                self.elements.append(geojson)
+                self.elements.append(marker)
                 
-                # Agregar marcador solo si es mall
-                if is_mall and row.geometry.geom_type in ['Polygon', 'MultiPolygon', 'Point']:
-                    # Obtener el centro del objeto
-                    if row.geometry.geom_type == 'Point':
-                        lat = row.geometry.y
-                        lon = row.geometry.x
-                    else:
-                        center = row.geometry.centroid
-                        lat = center.y
-                        lon = center.x
-                    
-                    # Crear el marcador con icono
-                    marker = folium.Marker(
-                        location=[lat, lon],
-                        tooltip=f"Centro comercial: {name}",
-                        popup=name,
-                        icon=folium.Icon(
-                            icon='shopping-cart',
-                            prefix='fa',
-                            color='red'
-                        )
-                    )
-                    self.elements.append(marker)
-                    
             except Exception as e:
                 # Si ocurre error, continuar con el siguiente
                 continue
     
     def get_layer_name(self):
-        return " Lugares Turísticos"
\ No newline at end of file
+        return " Lugares Turísticos"
@@ -14,7 +14,8 @@ def crear_mapa_completo():
         include_buses=True,
         include_crimes=True,
         heatmap_type='colored_polygons',
-        max_rutas=204
+        max_rutas=204,
+        release_data=True
     )
     
     if mapa:
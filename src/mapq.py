@@ -1,4 +1,8 @@
-import osmnx as ox
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 import folium
 import geopandas as gpd
 import pandas as pd
@@ -6,42 +10,181 @@ import pandas as pd
 from settings import settings
 from factories.district_layer_factory import DistrictLayerFactory
 from factories.parks_layer_factory import ParksLayerFactory
-from factories.tourist_place_layer_factory import TouristPlaceLayerFactory 
+from factories.tourist_place_layer_factory import TouristPlaceLayerFactory
 from factories.crimes_layer_factory import CrimesLayerFactory
 from folium_integration.metro.metro_factory import MetroFactory
 from folium_integration.bus.bus_factory import BusFactory
 from folium_integration.city_integration import CityTransportIntegration
-from factories.tourist_place_layer_factory import TouristPlaceLayerFactory
+from utils.spatial_utils import read_cached_geodataframe, simplify_geometries
+
+
+@lru_cache(maxsize=1)
+def _osmnx():
+    """
+    Importa osmnx solo al descargar datos: su importación tarda segundos y
+    no hace falta cuando todo sale de la caché en GeoParquet.
+    """
+    import osmnx as ox
+    
+    # Respuestas de Nominatim/Overpass reutilizadas entre ejecuciones
+    ox.settings.use_cache = True
+    ox.settings.cache_folder = settings.OSMNX_CACHE_DIR
+    return ox
+
+
+# Pocas consultas simultáneas para respetar el límite de uso de Nominatim
+GEOCODE_WORKERS = 4
+
+# Consultas a Overpass por distrito en paralelo
+FEATURE_WORKERS = 8
+
+# Copias para dibujar: ~10 m de tolerancia y coordenadas a 5 decimales
+RENDER_SIMPLIFY_TOLERANCE = 1e-4
+RENDER_COORDINATE_PRECISION = 1e-5
+
+# Combinaciones de sistemas de transporte guardadas entre llamadas a create_map
+TRANSPORT_CACHE_SIZE = 8
+TRANSPORT_SHAPEFILES = (
+    settings.SHP_METRO,
+    settings.SHP_METRO_STATIONS,
+    settings.SHP_BUS_ROUTES,
+    settings.SHP_BUS_STOPS
+)
+
+# Caracteres del HTML codificados y escritos por bloque al guardar el mapa
+SAVE_CHUNK_CHARS = 1 << 20
+
+
+def _mtimes(paths):
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(os.path.getmtime(path))
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
 
 class CityGraph:
+    PARK_TAGS = {'leisure': 'park'}
+    # Solo categorias especificas
+    TOURIST_TAGS = {
+        'tourism': [
+            'museum',
+            'attraction',
+            'viewpoint',
+            'gallery',
+            'theme_park'
+        ],
+        'shop': ['mall']
+    }
+    
+    # Columnas que usan las capas y el análisis; OSM trae decenas de tags más
+    DISTRICT_COLUMNS = ['display_name', 'name']
+    PARK_COLUMNS = ['name']
+    TOURIST_COLUMNS = ['name', 'tourism', 'shop', 'amenity']
+    
     _instance = None
     _graph = None
     _districts = None
     _parks = None
     _tourist_places = None
+    _render_graph = None
+    _render_parks = None
+    _render_tourist_places = None
+    _transport = {}
+    _loaded = set()
+    _lock = threading.RLock()
 
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._districts = cls._load_districts()
-            cls._graph = cls._load_graph()
-            cls._parks = cls._load_parks()
-            cls._tourist_places = cls._load_tourist_places()
+            with cls._lock:
+                if cls._instance is None:
+                    cls._districts = cls._load_districts()
+                    cls._instance = super().__new__(cls)
         return cls._instance
 
+    @classmethod
+    def _get_lazy(cls, attr, loader):
+        """
+        Carga un atributo de clase la primera vez que se pide. El lock evita
+        que sesiones concurrentes descarguen los mismos datos dos veces.
+        """
+        if attr not in cls._loaded:
+            with cls._lock:
+                if attr not in cls._loaded:
+                    setattr(cls, attr, loader())
+                    cls._loaded.add(attr)
+        return getattr(cls, attr)
+    
+    @classmethod
+    def release(cls, *attrs):
+        """
+        Libera capas cargadas (por defecto todas salvo los nombres de
+        distritos). Se vuelven a leer, desde la caché en disco, al pedirlas.
+        
+        Args:
+            *attrs: Atributos a liberar (ej: '_tourist_places', '_render_parks')
+        """
+        with cls._lock:
+            if not attrs:
+                cls._transport.clear()
+            for attr in attrs or tuple(cls._loaded):
+                setattr(cls, attr, None)
+                cls._loaded.discard(attr)
+    
+    @staticmethod
+    def _simplify_for_render(gdf):
+        """
+        Copia simplificada de una capa, solo para dibujar en Folium. El
+        análisis sigue usando las geometrías originales.
+        """
+        if gdf is None or len(gdf) == 0:
+            return gdf
+        light = simplify_geometries(
+            gdf,
+            tolerance=RENDER_SIMPLIFY_TOLERANCE,
+            grid_size=RENDER_COORDINATE_PRECISION
+        )
+        # Polígonos menores que la grilla quedan vacíos
+        return light[~light.geometry.is_empty]
+    
+    @classmethod
+    def _cached_osm(cls, name, loader, columns, tags=None):
+        """
+        Descarga de OSM, reducida a `columns` y la geometría, guardada en
+        GeoParquet por (distritos, tags, columnas)
+        """
+        def load():
+            gdf = loader()
+            if gdf is None:
+                return None
+            keep = [col for col in columns if col in gdf.columns]
+            return gdf[keep + [gdf.geometry.name]]
+        
+        params = {'districts': cls._districts, 'tags': tags, 'columns': columns}
+        return read_cached_geodataframe(settings.OSM_DATA_CACHE_DIR, name, load, params)
+
+    @staticmethod
+    def _geocode_district(district):
+        try:
+            return _osmnx().geocode_to_gdf(district)
+        except Exception as e:
+            print(f"No se pudo encontrar {district}: {e}")
+            return None
+    
     @classmethod
     def _load_graph(cls):
-        gdfs = []
-        for district in cls._districts:
-            try:
-                gdf_tmp = ox.geocode_to_gdf(district)
-                gdfs.append(gdf_tmp)
-            except Exception as e:
-                print(f"No se pudo encontrar {district}: {e}")
+        # Consultas a Nominatim independientes: en paralelo, conservando el orden
+        with ThreadPoolExecutor(max_workers=GEOCODE_WORKERS) as executor:
+            results = list(executor.map(cls._geocode_district, cls._districts))
+        gdfs = [gdf for gdf in results if gdf is not None]
         
         if gdfs:
             print(f"Se cargaron {len(gdfs)} distritos.")
-            return gpd.GeoDataFrame(pd.concat(gdfs, ignore_index=True))
+            # Sin copia extra del concat y conservando el CRS de Nominatim
+            merged = pd.concat(gdfs, ignore_index=True, copy=False)
+            return gpd.GeoDataFrame(merged, geometry='geometry', crs=gdfs[0].crs)
         return None
     
     @staticmethod
@@ -51,11 +194,42 @@ class CityGraph:
             districts_names.append(f"{district}, {settings.CITY}, {settings.COUNTRY}")
         return districts_names
     
+    @staticmethod
+    def _features_in_polygon(polygon, tags):
+        ox = _osmnx()
+        try:
+            return ox.features_from_polygon(polygon, tags=tags)
+        except ox._errors.InsufficientResponseError:
+            # Distrito sin features de esas categorías
+            return None
+    
+    @classmethod
+    def _load_features(cls, tags):
+        """
+        Descarga las features de cada distrito por separado y en paralelo,
+        recortadas a su polígono, en lugar de una sola consulta sobre la unión.
+        """
+        graph = cls._get_lazy('_graph', cls._load_cached_graph)
+        if graph is None or len(graph) == 0:
+            return _osmnx().features_from_place(cls._districts, tags=tags)
+        
+        polygons = list(graph.geometry)
+        with ThreadPoolExecutor(max_workers=FEATURE_WORKERS) as executor:
+            results = list(executor.map(lambda polygon: cls._features_in_polygon(polygon, tags), polygons))
+        gdfs = [gdf for gdf in results if gdf is not None and len(gdf) > 0]
+        
+        if not gdfs:
+            return None
+        
+        features = pd.concat(gdfs, copy=False)
+        # Una feature en el límite entre distritos llega en ambas respuestas
+        features = features[~features.index.duplicated(keep='first')]
+        return gpd.GeoDataFrame(features, geometry='geometry', crs=gdfs[0].crs)
+    
     @classmethod
     def _load_parks(cls):
         try:
-            tags = {'leisure': 'park'}
-            parks = ox.features_from_place(cls._districts, tags=tags)
+            parks = cls._load_features(cls.PARK_TAGS)
             if parks is not None and len(parks) > 0:
                 print(f"Se cargaron {len(parks)} parques.")
                 return parks
@@ -67,19 +241,7 @@ class CityGraph:
     @classmethod
     def _load_tourist_places(cls):
         try:
-            # Solo categorias especificas
-            tags = {
-                'tourism': [
-                    'museum',
-                    'attraction',
-                    'viewpoint',
-                    'gallery',
-                    'theme_park'
-                ],
-                'shop': ['mall']
-            }
-
-            places = ox.features_from_place(cls._districts, tags=tags)
+            places = cls._load_features(cls.TOURIST_TAGS)
 
             if places is not None and len(places) > 0:
                 print(f"Se cargaron {len(places)} lugares turisticos filtrados.")
@@ -90,17 +252,94 @@ class CityGraph:
             print(f"Error cargando lugares turisticos: {e}")
             return None
 
+    @classmethod
+    def _load_cached_graph(cls):
+        return cls._cached_osm('districts', cls._load_graph, cls.DISTRICT_COLUMNS)
+
     def get_parks(self):
-        return self._parks
+        return self._get_lazy(
+            '_parks',
+            lambda: self._cached_osm('parks', self._load_parks, self.PARK_COLUMNS, self.PARK_TAGS)
+        )
 
     def get_graph(self):
-        return self._graph
+        return self._get_lazy('_graph', self._load_cached_graph)
+        
+    def get_render_graph(self):
+        return self._get_lazy('_render_graph', lambda: self._simplify_for_render(self.get_graph()))
+    
+    def get_render_parks(self):
+        return self._get_lazy('_render_parks', lambda: self._simplify_for_render(self.get_parks()))
+    
+    def get_render_tourist_places(self):
+        return self._get_lazy(
+            '_render_tourist_places',
+            lambda: self._simplify_for_render(self.get_tourist_places())
+        )
         
     def get_places(self):
         return self._districts
     
     def get_tourist_places(self):
-        return self._tourist_places
+        return self._get_lazy(
+            '_tourist_places',
+            lambda: self._cached_osm(
+                'tourist_places', self._load_tourist_places, self.TOURIST_COLUMNS, self.TOURIST_TAGS
+            )
+        )
+
+    @classmethod
+    def _get_transport(cls, include_metro, include_buses, max_rutas, city_bbox):
+        """
+        Sistemas de transporte ya leídos para esta combinación de opciones.
+        La clave incluye la fecha de modificación de los shapefiles.
+        """
+        key = (include_metro, include_buses, max_rutas, city_bbox, _mtimes(TRANSPORT_SHAPEFILES))
+        
+        with cls._lock:
+            transport = cls._transport.get(key)
+        if transport is not None:
+            return transport
+        
+        # La lectura de shapefiles se hace fuera del lock para no bloquear
+        # a quien pide otra combinación ya cacheada
+        transport = cls._build_transport(include_metro, include_buses, max_rutas, city_bbox)
+        
+        with cls._lock:
+            # Si otro hilo la construyó mientras tanto, se usa la suya
+            if key not in cls._transport and len(cls._transport) >= TRANSPORT_CACHE_SIZE:
+                cls._transport.clear()
+            return cls._transport.setdefault(key, transport)
+    
+    @staticmethod
+    def _build_transport(include_metro, include_buses, max_rutas, city_bbox):
+        transport_integration = CityTransportIntegration()
+        factories = []
+
+        if include_metro:
+            metro_factory = MetroFactory(
+                settings.SHP_METRO, 
+                settings.SHP_METRO_STATIONS,
+                system_name="Metro",
+                bbox=city_bbox
+            )
+            factories.append(metro_factory)
+
+        if include_buses:
+            bus_factory = BusFactory(
+                settings.SHP_BUS_ROUTES, 
+                settings.SHP_BUS_STOPS,
+                system_name="Buses Urbanos",
+                max_routes=max_rutas,
+                max_stops=1000,
+                bbox=city_bbox
+            )
+            factories.append(bus_factory)
+
+        # Metro y buses se leen en paralelo
+        transport_integration.add_transport_systems(factories)
+        
+        return transport_integration
 
     def create_map(
             self,
@@ -110,48 +349,40 @@ class CityGraph:
             include_metro=True,
             include_buses=True,
             heatmap_type='colored_polygons',
-            max_rutas=50
+            max_rutas=50,
+            release_data=False
         ):
         
-        if self._graph is None:
+        graph = self.get_graph()
+        if graph is None:
             print("No hay datos suficientes para crear el mapa")
             return None
         
         try:
+            # Solo se leen features dentro del área de los distritos
+            city_bbox = tuple(graph.total_bounds)
+            
             # Calcular el centro del mapa
             if include_transport:
-                transport_integration = CityTransportIntegration()
-                
-                if include_metro:
-                    metro_factory = MetroFactory(
-                        settings.SHP_METRO, 
-                        settings.SHP_METRO_STATIONS,
-                        system_name="Metro"
-                    )
-                    transport_integration.add_transport_system(metro_factory)
-                
-                if include_buses:
-                    bus_factory = BusFactory(
-                        settings.SHP_BUS_ROUTES, 
-                        settings.SHP_BUS_STOPS,
-                        system_name="Buses Urbanos",
-                        max_routes=max_rutas,
-                        max_stops=1000
-                    )
-                    transport_integration.add_transport_system(bus_factory)
+                # Reutilizada entre mapas mientras no cambien los shapefiles
+                transport_integration = self._get_transport(
+                    include_metro, include_buses, max_rutas, city_bbox
+                )
                 
                 center = transport_integration.get_center()
                 center_lat, center_lon = center[0], center[1]
             else:
-                bounds = self._graph.total_bounds
+                bounds = graph.total_bounds
                 center_lat = (bounds[1] + bounds[3]) / 2
                 center_lon = (bounds[0] + bounds[2]) / 2
             
             # Crear mapa base
+            # Canvas compartido: miles de CircleMarkers sin un nodo SVG por marcador
             m = folium.Map(
                 location=[center_lat, center_lon],
                 zoom_start=12,
-                tiles='OpenStreetMap'
+                tiles='OpenStreetMap',
+                prefer_canvas=True
             )
             
             # Añadir capas de ciudad
@@ -169,6 +400,10 @@ class CityGraph:
 
             park_layers.add_to(m)
             tourism_layers.add_to(m)
+            
+            # Folium ya serializó las capas de ciudad: los GeoDataFrames no hacen falta para guardar
+            if release_data:
+                self.release()
 
 
             # Añadir capa de delitos
@@ -177,7 +412,8 @@ class CityGraph:
                 crime_factory = CrimesLayerFactory(
                     shapefile_path=settings.SHP_CRIMES,
                     layer_type=heatmap_type,
-                    color_field='color'
+                    color_field='color',
+                    bbox=city_bbox
                 )
                 crime_layers = crime_factory.create_layer()
                 for layer in crime_layers:
@@ -185,14 +421,19 @@ class CityGraph:
             
             # Añadir capas de transporte
             if include_transport:
-                transport_integration.add_layers_to_map(m)
+                transport_integration.add_layers_to_map(m, bounds=city_bbox)
             
             # Añadir control de capas
             folium.LayerControl(position='topright', collapsed=False).add_to(m)
             
             # Guardar mapa
             if save_path:
-                m.save(save_path)
+                # m.save codifica todo el HTML a bytes de una vez (doble memoria
+                # pico); aquí se codifica y escribe por bloques
+                html = m.get_root().render()
+                with open(save_path, 'w', encoding='utf-8') as f:
+                    for start in range(0, len(html), SAVE_CHUNK_CHARS):
+                        f.write(html[start:start + SAVE_CHUNK_CHARS])
                 print(f"\n✓ Mapa guardado en: {save_path}")
             
             return m
@@ -208,12 +449,14 @@ class CityGraph:
         return settings.CITY
     
     def get_districts_names(self) -> list:
-        if self._graph is not None and 'display_name' in self._graph.columns:
-            return self._graph['display_name'].tolist()
+        graph = self.get_graph()
+        if graph is not None and 'display_name' in graph.columns:
+            return graph['display_name'].tolist()
         return []
     
     def get_bounds(self) -> tuple:
-        if self._graph is not None:
-            bounds = self._graph.total_bounds
+        graph = self.get_graph()
+        if graph is not None:
+            bounds = graph.total_bounds
             return tuple(bounds)
         return None
\ No newline at end of file
@@ -1,8 +1,15 @@
+import logging
+
 from observers.map_state import Observer, MapState
 from analyzers.district_analyzer import DistrictAnalyzer
 
+logger = logging.getLogger(__name__)
+
 
 class CacheObserver(Observer):    
+    # Cambios que invalidan caché
+    INVALIDATING_CHANGES = frozenset({'layers', 'param', 'reset'})
+    
     def __init__(self, district_analyzer: DistrictAnalyzer):
         self.analyzer = district_analyzer
         self.cache_valid = True
@@ -16,14 +23,7 @@ class CacheObserver(Observer):
             change_type: Tipo de cambio
             **kwargs: Datos adicionales del cambio
         """
-        # Cambios que invalidan caché
-        invalidating_changes = [
-            'layers',
-            'param', 
-            'reset'  
-        ]
-        
-        if change_type in invalidating_changes:
+        if change_type in self.INVALIDATING_CHANGES:
             self._invalidate_cache(change_type, **kwargs)
     
     def _invalidate_cache(self, reason: str, **kwargs):
@@ -45,21 +45,20 @@ class CacheObserver(Observer):
             
             if not (added & affected_layers or removed & affected_layers):
                 # Cambio en capas visuales, no afecta métricas
-                print(" CacheObserver: Cambio en capas visuales, caché sigue válido")
+                logger.debug("CacheObserver: Cambio en capas visuales, caché sigue válido")
                 return
         
-        print(f"\n CacheObserver: Invalidando caché")
-        print(f"   Razón: {reason}")
+        logger.debug("CacheObserver: Invalidando caché (razón: %s)", reason)
         
         # Invalidar caché del analyzer
         self.analyzer.invalidate_cache()
         self.cache_valid = False
         
-        print("Caché invalidado - se recalculará en próxima solicitud")
+        logger.debug("Caché invalidado - se recalculará en próxima solicitud")
     
     def is_cache_valid(self) -> bool:
         return self.cache_valid
     
     def mark_cache_valid(self):
         self.cache_valid = True
-        print("CacheObserver: Caché marcado como válido")
\ No newline at end of file
+        logger.debug("CacheObserver: Caché marcado como válido")
\ No newline at end of file
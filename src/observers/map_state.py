@@ -1,7 +1,18 @@
-from typing import Set, List, Optional, Dict, Any
+import logging
+import math
+from collections import defaultdict
+from typing import Set, FrozenSet, List, Optional, Dict, Any, Iterable
 from abc import ABC, abstractmethod
 from strategies.base_strategy import BaseStrategy
 
+logger = logging.getLogger(__name__)
+
+# Lados del viewport comparados en _bounds_changed_significantly
+_BOUNDS_KEYS = ('north', 'south', 'east', 'west')
+
+# Celdas por grado al cuantizar el viewport (1 / umbral de cambio significativo)
+_VIEWPORT_GRID = 100
+
 
 class Observer(ABC):    
     @abstractmethod
@@ -35,28 +46,35 @@ class MapState:
         self._current_strategy: Optional[BaseStrategy] = None
         self._active_layers: Set[str] = set()
         self._viewport_bounds: Optional[Dict[str, float]] = None
+        self._viewport_key: Optional[tuple] = None
         self._additional_params: Dict[str, Any] = {}
         
-        # Lista de observadores
+        # Lista de observadores y suscripciones por tipo de cambio
+        # (la clave None agrupa a los que reciben todos los cambios)
         self._observers: List[Observer] = []
+        self._subscriptions: Dict[Optional[str], List[Observer]] = defaultdict(list)
         
         # Flag para habilitar/deshabilitar notificaciones
         self._notifications_enabled: bool = True
     
     # ========== Gestión de Observadores ==========
     
-    def attach(self, observer: Observer):
+    def attach(self, observer: Observer, change_types: Optional[Iterable[str]] = None):
         """
         Registra un observador.
         
         Args:
             observer: Instancia de Observer a registrar
+            change_types: Tipos de cambio que le interesan (None = todos).
+                          Solo se le notifican esos cambios.
         """
         if observer not in self._observers:
             self._observers.append(observer)
-            print(f"Observer registrado: {observer.__class__.__name__}")
+            for change_type in (set(change_types) if change_types is not None else [None]):
+                self._subscriptions[change_type].append(observer)
+            logger.debug("Observer registrado: %s", observer.__class__.__name__)
         else:
-            print(f" Observer ya registrado: {observer.__class__.__name__}")
+            logger.debug("Observer ya registrado: %s", observer.__class__.__name__)
     
     def detach(self, observer: Observer):
         """
@@ -67,9 +85,12 @@ class MapState:
         """
         if observer in self._observers:
             self._observers.remove(observer)
-            print(f"Observer desuscrito: {observer.__class__.__name__}")
+            for subscribers in self._subscriptions.values():
+                if observer in subscribers:
+                    subscribers.remove(observer)
+            logger.debug("Observer desuscrito: %s", observer.__class__.__name__)
         else:
-            print(f" Observer no estaba registrado: {observer.__class__.__name__}")
+            logger.debug("Observer no estaba registrado: %s", observer.__class__.__name__)
     
     def notify(self, change_type: str, **kwargs):
         """
@@ -82,22 +103,24 @@ class MapState:
         if not self._notifications_enabled:
             return
         
-        print(f"\nNotificando cambio: {change_type}")
-        print(f"   Observadores a notificar: {len(self._observers)}")
+        # Solo los suscritos a todos los cambios o a este tipo
+        observers = self._subscriptions.get(None, []) + self._subscriptions.get(change_type, [])
+        
+        logger.debug("Notificando cambio: %s (%d observadores)", change_type, len(observers))
         
-        for observer in self._observers:
+        for observer in observers:
             try:
                 observer.update(self, change_type, **kwargs)
             except Exception as e:
-                print(f"Error en observer {observer.__class__.__name__}: {e}")
+                logger.exception("Error en observer %s: %s", observer.__class__.__name__, e)
     
     def disable_notifications(self):
         self._notifications_enabled = False
-        print("Notificaciones deshabilitadas")
+        logger.debug("Notificaciones deshabilitadas")
     
     def enable_notifications(self):
         self._notifications_enabled = True
-        print("Notificaciones habilitadas")
+        logger.debug("Notificaciones habilitadas")
     
     # ========== Getters y Setters con Notificación ==========
     
@@ -115,9 +138,12 @@ class MapState:
         old_strategy = self._current_strategy
         self._current_strategy = strategy
         
-        print(f"\nEstrategia cambiada:")
-        print(f"   Anterior: {old_strategy.get_name() if old_strategy else 'Ninguna'}")
-        print(f"   Nueva: {strategy.get_name()}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Estrategia cambiada: %s → %s",
+                old_strategy.get_name() if old_strategy else 'Ninguna',
+                strategy.get_name()
+            )
         
         self.notify(
             'strategy',
@@ -126,8 +152,8 @@ class MapState:
         )
     
     @property
-    def active_layers(self) -> Set[str]:
-        return self._active_layers.copy()
+    def active_layers(self) -> FrozenSet[str]:
+        return frozenset(self._active_layers)
     
     def set_active_layers(self, layers: Set[str]):
         """
@@ -136,18 +162,20 @@ class MapState:
         Args:
             layers: Conjunto de nombres de capas activas
         """
-        old_layers = self._active_layers.copy()
-        self._active_layers = layers.copy()
+        # El set anterior se reemplaza (no se modifica), así que no hace falta copiarlo
+        old_layers = self._active_layers
+        self._active_layers = set(layers)
         
-        added = layers - old_layers
-        removed = old_layers - layers
+        added = self._active_layers.difference(old_layers)
+        removed = old_layers.difference(self._active_layers)
         
         if added or removed:
-            print(f"\n Capas modificadas:")
-            if added:
-                print(f"   Agregadas: {', '.join(added)}")
-            if removed:
-                print(f"   Removidas: {', '.join(removed)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Capas modificadas. Agregadas: %s. Removidas: %s",
+                    ', '.join(added) or '-',
+                    ', '.join(removed) or '-'
+                )
             
             self.notify(
                 'layers',
@@ -171,7 +199,7 @@ class MapState:
             self._active_layers.add(layer_name)
             action = "activada"
         
-        print(f"\nCapa '{layer_name}' {action}")
+        logger.debug("Capa '%s' %s", layer_name, action)
         
         self.notify(
             'layer_toggle',
@@ -193,10 +221,17 @@ class MapState:
         old_bounds = self._viewport_bounds
         self._viewport_bounds = bounds.copy()
         
+        # Misma celda de 0.01° en los cuatro lados: ningún lado se movió más
+        # que el umbral, se evita la comparación completa
+        new_key = tuple(math.floor(bounds.get(key, 0) * _VIEWPORT_GRID) for key in _BOUNDS_KEYS)
+        if new_key == self._viewport_key:
+            return
+        self._viewport_key = new_key
+        
         # Solo notificar si cambió significativamente
         if self._bounds_changed_significantly(old_bounds, bounds):
-            print(f"\n Viewport cambió:")
-            print(f"   Bounds: {bounds}")
+            # Se llama en cada pan/zoom: sin formatear si el nivel DEBUG no está activo
+            logger.debug("Viewport cambió: %s", bounds)
             
             self.notify(
                 'viewport',
@@ -219,7 +254,7 @@ class MapState:
             return True
         
         # Calcular diferencia en cada dirección
-        for key in ['north', 'south', 'east', 'west']:
+        for key in _BOUNDS_KEYS:
             if abs(old_bounds.get(key, 0) - new_bounds.get(key, 0)) > threshold:
                 return True
         
@@ -237,7 +272,7 @@ class MapState:
         self._additional_params[key] = value
         
         if old_value != value:
-            print(f"\n Parámetro '{key}' cambiado: {old_value} → {value}")
+            logger.debug("Parámetro '%s' cambiado: %s → %s", key, old_value, value)
             
             self.notify(
                 'param',
@@ -265,6 +300,7 @@ class MapState:
         self._current_strategy = None
         self._active_layers.clear()
         self._viewport_bounds = None
+        self._viewport_key = None
         self._additional_params.clear()
         
         self.notify('reset')
@@ -1,8 +1,30 @@
+import logging
 from typing import Optional, Dict
+import numpy as np
 import pandas as pd
 
 from observers.map_state import Observer, MapState
 from analyzers.district_analyzer import DistrictAnalyzer
+from strategies.base_strategy import METRIC_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Columnas que muestra la UI en el ranking
+DISPLAY_COLUMNS = ['district_name', 'score', 'rank', 'safety', 'transport', 'green', 'services']
+
+
+def _min_ranks(sorted_scores: np.ndarray) -> np.ndarray:
+    """
+    Ranking 'min' (empates comparten el menor puesto) de scores ya
+    ordenados de mayor a menor.
+    """
+    positions = np.arange(len(sorted_scores))
+    starts_group = np.empty(len(sorted_scores), dtype=bool)
+    starts_group[:1] = True
+    starts_group[1:] = sorted_scores[1:] != sorted_scores[:-1]
+    
+    # Cada posición toma el índice donde empieza su grupo de empate
+    return np.maximum.accumulate(np.where(starts_group, positions, 0)) + 1
 
 
 class RecommendationObserver(Observer):    
@@ -10,6 +32,8 @@ class RecommendationObserver(Observer):
         self.analyzer = district_analyzer
         self.current_scores: Optional[pd.DataFrame] = None
         self.current_strategy_name: Optional[str] = None
+        self._name_to_row: Dict[str, int] = {}
+        self._display_scores: Optional[pd.DataFrame] = None
     
     def update(self, state: MapState, change_type: str, **kwargs):
         """
@@ -35,68 +59,72 @@ class RecommendationObserver(Observer):
         new_strategy = kwargs.get('new_strategy')
         
         if new_strategy is None:
-            print(" RecommendationObserver: Nueva estrategia es None")
+            logger.debug("RecommendationObserver: Nueva estrategia es None")
             return
         
-        print(f"\nRecommendationObserver: Recalculando scores...")
-        print(f"   Estrategia: {new_strategy.get_name()}")
+        logger.debug("RecommendationObserver: Recalculando scores (estrategia: %s)", new_strategy.get_name())
         
         # Obtener métricas del analyzer
         if self.analyzer.metrics_df is None:
-            print("No hay métricas disponibles en el analyzer")
+            logger.debug("No hay métricas disponibles en el analyzer")
             return
         
         metrics_df = self.analyzer.metrics_df
         
-        # Calcular scores con la nueva estrategia
-        scores = []
-        for idx, row in metrics_df.iterrows():
-            metrics_dict = {
-                'safety': row['safety'],
-                'transport': row['transport'],
-                'green': row['green'],
-                'services': row['services']
-            }
-            
-            score = new_strategy.calculate_final_score(metrics_dict)
-            scores.append(score)
-        
-        # Crear DataFrame con scores
-        self.current_scores = metrics_df.copy()
-        self.current_scores['score'] = scores
-        self.current_scores['rank'] = self.current_scores['score'].rank(
-            ascending=False,
-            method='min'
-        ).astype(int)
-        
-        # Ordenar por score
-        self.current_scores = self.current_scores.sort_values(
-            'score',
-            ascending=False
-        ).reset_index(drop=True)
+        # Calcular scores con la nueva estrategia (todos los distritos a la vez)
+        scores = new_strategy.calculate_final_score_batch(metrics_df)
+        
+        # Ordenar por score una sola vez
+        order = np.argsort(-scores, kind='stable')
+        sorted_scores = scores[order]
+        
+        # Un único gather por columna, sin copias intermedias del DataFrame.
+        # Métricas y score en float32 (valores en [0, 1], se muestran con 3
+        # decimales); el ranking se calcula antes con los scores en float64
+        columns = {
+            column: (
+                values.to_numpy(dtype=np.float32)[order]
+                if column in METRIC_COLUMNS else values.array.take(order)
+            )
+            for column, values in metrics_df.items()
+        }
+        columns['score'] = sorted_scores.astype(np.float32)
+        columns['rank'] = _min_ranks(sorted_scores)
+        
+        self.current_scores = pd.DataFrame(columns, copy=False)
+        
+        # Índice nombre -> fila; recorrido inverso para que, ante nombres
+        # repetidos, gane la primera fila (igual que el filtro anterior)
+        names = self.current_scores['district_name'].to_numpy()
+        self._name_to_row = dict(zip(names[::-1], range(len(names) - 1, -1, -1)))
+        
+        # Selección de columnas para la UI, hecha una vez por recálculo
+        self._display_scores = self.current_scores.loc[:, DISPLAY_COLUMNS]
         
         self.current_strategy_name = new_strategy.get_name()
         
-        print(f"Scores recalculados:")
-        print(f"   Top distrito: {self.current_scores.iloc[0]['district_name']} "
-              f"(score: {self.current_scores.iloc[0]['score']:.3f})")
-        print(f"   Promedio: {self.current_scores['score'].mean():.3f}")
+        # El promedio solo se calcula si el mensaje se va a emitir
+        if logger.isEnabledFor(logging.DEBUG) and len(sorted_scores):
+            logger.debug(
+                "Scores recalculados: top distrito %s (score: %.3f), promedio %.3f",
+                self.current_scores['district_name'].iat[0], sorted_scores[0], sorted_scores.mean()
+            )
     
     def _handle_reset(self):
-        print("\nRecommendationObserver: Limpiando scores...")
+        logger.debug("RecommendationObserver: Limpiando scores")
         self.current_scores = None
         self.current_strategy_name = None
+        self._name_to_row = {}
+        self._display_scores = None
     
     def get_scores_df(self) -> Optional[pd.DataFrame]:
         return self.current_scores
     
     def get_top_districts(self, n: int = 5) -> Optional[pd.DataFrame]:
-        if self.current_scores is None:
+        if self._display_scores is None:
             return None
         
-        return self.current_scores.head(n)[
-            ['district_name', 'score', 'rank', 'safety', 'transport', 'green', 'services']
-        ]
+        return self._display_scores.head(n)
     
     def get_district_score(self, district_name: str) -> Optional[Dict]:
         """
@@ -111,23 +139,21 @@ class RecommendationObserver(Observer):
         if self.current_scores is None:
             return None
         
-        district = self.current_scores[
-            self.current_scores['district_name'] == district_name
-        ]
+        row = self._name_to_row.get(district_name)
         
-        if len(district) == 0:
+        if row is None:
             return None
         
-        district = district.iloc[0]
+        district = self.current_scores.iloc[row]
         
         return {
             'name': district['district_name'],
-            'score': district['score'],
+            'score': float(district['score']),
             'rank': district['rank'],
             'metrics': {
-                'safety': district['safety'],
-                'transport': district['transport'],
-                'green': district['green'],
-                'services': district['services']
+                'safety': float(district['safety']),
+                'transport': float(district['transport']),
+                'green': float(district['green']),
+                'services': float(district['services'])
             }
         }
\ No newline at end of file
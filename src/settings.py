@@ -13,5 +13,7 @@ class Settings(BaseSettings):
   SHP_BUS_ROUTES: str
   SHP_BUS_STOPS: str
   SHP_CRIMES: str
+  OSMNX_CACHE_DIR: str = str(BASE_DIR / "data" / "cache" / "osmnx")
+  OSM_DATA_CACHE_DIR: str = str(BASE_DIR / "data" / "cache" / "osm")
 
 settings = Settings()
\ No newline at end of file
@@ -1,15 +1,130 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
+import numpy as np
 import pandas as pd
 
+from utils.jit import njit, prange, NUMBA_AVAILABLE
+
+# Columnas de métricas que reciben las estrategias
+METRIC_COLUMNS = ('safety', 'transport', 'green', 'services')
+
+# Cada método escalar y su equivalente vectorizado
+_BATCH_COUNTERPARTS = (
+    ('calculate_score', 'calculate_score_batch'),
+    ('apply_penalties', 'apply_penalties_batch'),
+    ('apply_bonuses', 'apply_bonuses_batch'),
+    ('calculate_final_score', 'calculate_final_score_batch'),
+)
+
+
+def _rule_arrays(rules: Tuple) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convierte reglas (umbrales por métrica, factor) en una matriz de
+    umbrales alineada con METRIC_COLUMNS (NaN = métrica sin umbral) y un
+    vector de factores, que es lo que recibe el kernel.
+    """
+    thresholds = np.full((len(rules), len(METRIC_COLUMNS)), np.nan)
+    factors = np.empty(len(rules))
+    
+    for k, (rule_thresholds, factor) in enumerate(rules):
+        for metric, threshold in rule_thresholds.items():
+            thresholds[k, METRIC_COLUMNS.index(metric)] = threshold
+        factors[k] = factor
+    
+    return thresholds, factors
+
+
+@njit(cache=True)
+def _row_score(row, weights):
+    """Score base de una fila (los NaN no suman score ni peso)"""
+    total_score = 0.0
+    total_weight = 0.0
+    
+    for j in range(row.shape[0]):
+        if not np.isnan(row[j]):
+            total_score += row[j] * weights[j]
+            total_weight += weights[j]
+    
+    if total_weight > 0:
+        return total_score / total_weight
+    return 0.0
+
+
+@njit(cache=True)
+def _first_penalty(row, thresholds):
+    """Primera regla con alguna métrica bajo su umbral, o -1"""
+    for k in range(thresholds.shape[0]):
+        for j in range(row.shape[0]):
+            # Las comparaciones con NaN (umbral o valor) son falsas
+            if row[j] < thresholds[k, j]:
+                return k
+    return -1
+
+
+@njit(cache=True)
+def _first_bonus(row, thresholds):
+    """Primera regla con todas sus métricas sobre el umbral, o -1"""
+    for k in range(thresholds.shape[0]):
+        matched = True
+        for j in range(row.shape[0]):
+            if not np.isnan(thresholds[k, j]) and not row[j] > thresholds[k, j]:
+                matched = False
+                break
+        if matched:
+            return k
+    return -1
+
+
+@njit(cache=True, parallel=True)
+def _score_kernel(values, weights, penalty_thresholds, penalty_factors,
+                  bonus_thresholds, bonus_factors, out):
+    """
+    Escribe en out el score final de cada fila en una sola pasada; los
+    umbrales y factores de cada estrategia llegan como arrays.
+    """
+    for i in prange(values.shape[0]):
+        row = values[i]
+        score = _row_score(row, weights)
+        
+        k = _first_penalty(row, penalty_thresholds)
+        if k >= 0:
+            score *= penalty_factors[k]
+        
+        k = _first_bonus(row, bonus_thresholds)
+        if k >= 0:
+            score = min(score * bonus_factors[k], 1.0)
+        
+        out[i] = min(max(score, 0.0), 1.0)
+
 
 class BaseStrategy(ABC):    
+    # Reglas (umbrales por métrica, factor). En cada lista se aplica solo
+    # la primera que se cumple: una penalización cuando ALGUNA métrica
+    # está por debajo de su umbral, una bonificación cuando TODAS lo
+    # superan (el score bonificado no pasa de 1.0)
+    PENALTY_RULES: Tuple[Tuple[Dict[str, float], float], ...] = ()
+    BONUS_RULES: Tuple[Tuple[Dict[str, float], float], ...] = ()
+    # Valor que toma en las reglas una métrica ausente del dict; sin
+    # default, la métrica ausente cuenta como NaN y nunca cumple la regla
+    PENALTY_DEFAULTS: Dict[str, float] = {}
+    BONUS_DEFAULTS: Dict[str, float] = {}
+    
     def __init__(self, config: Optional[Dict] = None):
         self.config = config or {}
         self._weights = self._default_weights()
         
         if 'weights' in self.config:
             self._weights.update(self.config['weights'])
+        
+        # Pesos alineados con METRIC_COLUMNS para la versión vectorizada
+        self._weight_vec = np.array(
+            [self._weights.get(metric, 0.0) for metric in METRIC_COLUMNS],
+            dtype=np.float64
+        )
+        
+        # Umbrales y factores como arrays, listos para el kernel
+        self._penalty_thresholds, self._penalty_factors = _rule_arrays(self.PENALTY_RULES)
+        self._bonus_thresholds, self._bonus_factors = _rule_arrays(self.BONUS_RULES)
     
     @abstractmethod
     def _default_weights(self) -> Dict[str, float]:
@@ -69,9 +184,16 @@ class BaseStrategy(ABC):
             float: Score ajustado después de penalizaciones
         
         Note:
-            Las estrategias pueden sobrescribir este método para aplicar
-            penalizaciones específicas (ej: penalizar zonas inseguras)
+            Aplica la primera regla de PENALTY_RULES con alguna métrica por
+            debajo de su umbral (ej: penalizar zonas inseguras)
         """
+        for thresholds, factor in self.PENALTY_RULES:
+            if any(
+                metrics.get(metric, self.PENALTY_DEFAULTS.get(metric, np.nan)) < threshold
+                for metric, threshold in thresholds.items()
+            ):
+                return base_score * factor
+        
         return base_score
     
     def apply_bonuses(self, metrics: Dict[str, float], base_score: float) -> float:
@@ -86,9 +208,16 @@ class BaseStrategy(ABC):
             float: Score ajustado después de bonificaciones
         
         Note:
-            Las estrategias pueden sobrescribir este método para aplicar
-            bonificaciones específicas (ej: bonus por tener metro)
+            Aplica la primera regla de BONUS_RULES con todas sus métricas
+            sobre el umbral (ej: bonus por tener metro)
         """
+        for thresholds, factor in self.BONUS_RULES:
+            if all(
+                metrics.get(metric, self.BONUS_DEFAULTS.get(metric, np.nan)) > threshold
+                for metric, threshold in thresholds.items()
+            ):
+                return min(base_score * factor, 1.0)
+        
         return base_score
     
     def calculate_final_score(self, metrics: Dict[str, float]) -> float:
@@ -117,6 +246,143 @@ class BaseStrategy(ABC):
         
         return final_score
     
+    # ========== Versión vectorizada (todos los distritos a la vez) ==========
+    
+    def calculate_score_batch(self, metrics: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Equivalente vectorizado de calculate_score.
+        
+        Args:
+            metrics: Dict métrica -> array con el valor de cada distrito
+        
+        Returns:
+            np.ndarray: Score base de cada distrito
+        """
+        n = len(next(iter(metrics.values()))) if metrics else 0
+        
+        # Matriz (distritos x métricas); una métrica ausente cuenta como NaN
+        values = np.column_stack([
+            metrics.get(metric, np.full(n, np.nan)) for metric in METRIC_COLUMNS
+        ]) if n else np.empty((0, len(METRIC_COLUMNS)))
+        
+        # Los valores NaN no suman score ni peso
+        valid = ~np.isnan(values)
+        total_score = np.where(valid, values, 0.0) @ self._weight_vec
+        total_weight = valid @ self._weight_vec
+        
+        # Normalizar por el peso total disponible en cada distrito
+        return np.divide(total_score, total_weight, out=np.zeros(n), where=total_weight > 0)
+    
+    def apply_penalties_batch(self, metrics: Dict[str, np.ndarray], scores: np.ndarray) -> np.ndarray:
+        """Equivalente vectorizado de apply_penalties"""
+        if not self.PENALTY_RULES:
+            return scores
+        
+        conditions = [
+            np.logical_or.reduce([metrics[metric] < threshold for metric, threshold in thresholds.items()])
+            for thresholds, _ in self.PENALTY_RULES
+        ]
+        factors = [factor for _, factor in self.PENALTY_RULES]
+        
+        return scores * np.select(conditions, factors, default=1.0)
+    
+    def apply_bonuses_batch(self, metrics: Dict[str, np.ndarray], scores: np.ndarray) -> np.ndarray:
+        """Equivalente vectorizado de apply_bonuses"""
+        if not self.BONUS_RULES:
+            return scores
+        
+        conditions = [
+            np.logical_and.reduce([metrics[metric] > threshold for metric, threshold in thresholds.items()])
+            for thresholds, _ in self.BONUS_RULES
+        ]
+        factors = [factor for _, factor in self.BONUS_RULES]
+        
+        bonus = np.select(conditions, factors, default=1.0)
+        matched = np.logical_or.reduce(conditions)
+        return np.where(matched, np.minimum(scores * bonus, 1.0), scores)
+    
+    def calculate_final_score_batch(self, metrics_df: pd.DataFrame) -> np.ndarray:
+        """
+        Calcula el score final de todos los distritos sin iterar por filas.
+        
+        Las estrategias que sobrescriben calculate_final_score,
+        apply_penalties o apply_bonuses deben sobrescribir también sus
+        versiones *_batch; si no lo hacen, se recorre fila a fila con
+        calculate_final_score.
+        
+        Args:
+            metrics_df: DataFrame con las columnas de METRIC_COLUMNS
+        
+        Returns:
+            np.ndarray: Score final (0.0 - 1.0) de cada fila
+        """
+        if NUMBA_AVAILABLE and self._supports_kernel():
+            # Una sola pasada sobre una matriz contigua (distritos x métricas)
+            values = np.ascontiguousarray(
+                metrics_df[list(METRIC_COLUMNS)].to_numpy(dtype=np.float64)
+            )
+            
+            # Salida reservada fuera de la región paralela del kernel
+            out = np.empty(len(values))
+            _score_kernel(
+                values, self._weight_vec,
+                self._penalty_thresholds, self._penalty_factors,
+                self._bonus_thresholds, self._bonus_factors,
+                out
+            )
+            return out
+        
+        if not self._supports_batch():
+            return np.fromiter(
+                (
+                    self.calculate_final_score(dict(zip(METRIC_COLUMNS, row)))
+                    for row in metrics_df[list(METRIC_COLUMNS)].itertuples(index=False, name=None)
+                ),
+                dtype=np.float64,
+                count=len(metrics_df)
+            )
+        
+        metrics = {
+            column: metrics_df[column].to_numpy(dtype=np.float64)
+            for column in METRIC_COLUMNS
+        }
+        
+        base_scores = self.calculate_score_batch(metrics)
+        scores = self.apply_penalties_batch(metrics, base_scores)
+        scores = self.apply_bonuses_batch(metrics, scores)
+        
+        return np.clip(scores, 0.0, 1.0)
+    
+    def _supports_batch(self) -> bool:
+        """
+        Indica si los métodos *_batch reflejan la lógica escalar.
+        
+        Falla cuando una subclase sobrescribe un método escalar más abajo
+        en la jerarquía que su equivalente vectorizado.
+        """
+        return all(
+            self._defined_at(batch) <= self._defined_at(scalar)
+            for scalar, batch in _BATCH_COUNTERPARTS
+        )
+    
+    def _supports_kernel(self) -> bool:
+        """
+        Indica si el kernel compartido refleja la estrategia: ningún
+        método de score (escalar o *_batch) está sobrescrito, así que
+        las reglas son todo lo que la distingue.
+        """
+        return all(
+            getattr(type(self), method) is getattr(BaseStrategy, method)
+            for pair in _BATCH_COUNTERPARTS
+            for method in pair
+        )
+    
+    def _defined_at(self, name: str) -> int:
+        """Posición en el MRO de la clase que define `name`"""
+        return next(
+            i for i, klass in enumerate(type(self).__mro__) if name in vars(klass)
+        )
+    
     def get_color_scheme(self) -> str:
         """
         Retorna el esquema de colores para visualización.
@@ -19,6 +19,19 @@ class ConvenienceStrategy(BaseStrategy):
     - Distritos con todo cerca (servicios + transporte + recreación)
     """
     
+    PENALTY_RULES = (
+        # Falta acceso básico (services o transport < 0.3): penalización del 15%
+        ({'services': 0.3, 'transport': 0.3}, 0.85),
+    )
+    BONUS_RULES = (
+        # Distrito "completo" (services, transport y green > 0.6): bonus del 20%
+        ({'services': 0.6, 'transport': 0.6, 'green': 0.6}, 1.2),
+        # Servicios + transporte (ambos > 0.7): bonus del 10%
+        ({'services': 0.7, 'transport': 0.7}, 1.1),
+    )
+    PENALTY_DEFAULTS = {'services': 0.0, 'transport': 0.0}
+    BONUS_DEFAULTS = {'services': 0.0, 'transport': 0.0, 'green': 0.0}
+    
     def _default_weights(self) -> Dict[str, float]:
         return {
             'services': 0.45,
@@ -31,43 +44,4 @@ class ConvenienceStrategy(BaseStrategy):
         return "Servicios y Conveniencia"
     
     def get_description(self) -> str:
-        return "Maximiza acceso a comercio, transporte y recreación"
-    
-    def apply_bonuses(self, metrics: Dict[str, float], base_score: float) -> float:
-        """
-        Bonificación por tener 'todo cerca'.
-        
-        Si services, transport y green están todos > 0.6, bonus significativo.
-        """
-        services = metrics.get('services', 0.0)
-        transport = metrics.get('transport', 0.0)
-        green = metrics.get('green', 0.0)
-        
-        # Bonus por tener todo
-        if services > 0.6 and transport > 0.6 and green > 0.6:
-            # Distrito "completo"
-            bonus = 1.2
-            return min(base_score * bonus, 1.0)
-        
-        # Bonus menor por servicios + transporte
-        if services > 0.7 and transport > 0.7:
-            bonus = 1.1
-            return min(base_score * bonus, 1.0)
-        
-        return base_score
-    
-    def apply_penalties(self, metrics: Dict[str, float], base_score: float) -> float:
-        """
-        Penalización leve si falta algún componente crítico.
-        
-        Si services O transport < 0.3, penalizar.
-        """
-        services = metrics.get('services', 0.0)
-        transport = metrics.get('transport', 0.0)
-        
-        # Penalizar si falta acceso básico
-        if services < 0.3 or transport < 0.3:
-            penalty = 0.85
-            return base_score * penalty
-        
-        return base_score
\ No newline at end of file
+        return "Maximiza acceso a comercio, transporte y recreación"
\ No newline at end of file
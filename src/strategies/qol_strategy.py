@@ -18,6 +18,17 @@ class QualityOfLifeStrategy(BaseStrategy):
     - Distritos con alta cobertura verde y buena seguridad
     """
     
+    PENALTY_RULES = (
+        # Zona muy insegura (safety < 0.3): penalización del 20%
+        ({'safety': 0.3}, 0.8),
+    )
+    BONUS_RULES = (
+        # Combinación ideal (safety > 0.8 y green > 0.6): bonus del 10%
+        ({'safety': 0.8, 'green': 0.6}, 1.1),
+    )
+    PENALTY_DEFAULTS = {'safety': 0.5}
+    BONUS_DEFAULTS = {'safety': 0.0, 'green': 0.0}
+    
     def _default_weights(self) -> Dict[str, float]:
         return {
             'safety': 0.40,
@@ -30,35 +41,4 @@ class QualityOfLifeStrategy(BaseStrategy):
         return "Calidad de Vida"
     
     def get_description(self) -> str:
-        return "Prioriza seguridad, acceso a transporte y espacios verdes para residentes"
-    
-    def apply_penalties(self, metrics: Dict[str, float], base_score: float) -> float:
-        """
-        Aplica penalizaciones por baja seguridad.
-        
-        Si safety < 0.3 (zona muy insegura), penalizar score.
-        """
-        safety = metrics.get('safety', 0.5)
-        
-        if safety < 0.3:
-            # Penalización del 20% si es muy inseguro
-            penalty = 0.8
-            return base_score * penalty
-        
-        return base_score
-    
-    def apply_bonuses(self, metrics: Dict[str, float], base_score: float) -> float:
-        """
-        Aplica bonificaciones por excelencia en seguridad + verde.
-        
-        Si safety > 0.8 Y green > 0.6, dar bonus del 10%.
-        """
-        safety = metrics.get('safety', 0.0)
-        green = metrics.get('green', 0.0)
-        
-        if safety > 0.8 and green > 0.6:
-            # Bonus del 10% por combinación ideal
-            bonus = 1.1
-            return min(base_score * bonus, 1.0)
-        
-        return base_score
\ No newline at end of file
+        return "Prioriza seguridad, acceso a transporte y espacios verdes para residentes"
\ No newline at end of file
@@ -1,4 +1,7 @@
+from functools import lru_cache
 from typing import Dict, Optional
+import json
+import os
 import yaml
 
 from strategies.base_strategy import BaseStrategy
@@ -7,6 +10,13 @@ from strategies.tourist_strategy import TouristStrategy
 from strategies.convenience_strategy import ConvenienceStrategy
 
 
+@lru_cache(maxsize=8)
+def _load_yaml(path: str, mtime: float) -> Dict:
+    """YAML parseado por ruta; mtime en la clave para releer si cambia"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
 class StrategyFactory:    
     _STRATEGIES = {
         'quality_of_life': QualityOfLifeStrategy,
@@ -14,6 +24,9 @@ class StrategyFactory:
         'convenience': ConvenienceStrategy,
     }
     
+    # Instancias ya creadas por (nombre, config serializada)
+    _instance_cache: Dict[tuple, BaseStrategy] = {}
+    
     @classmethod
     def create_strategy(
         cls,
@@ -23,6 +36,9 @@ class StrategyFactory:
         """
         Crea una instancia de estrategia por nombre.
         
+        Las estrategias no guardan estado de los distritos, así que se
+        reutiliza la misma instancia para un mismo nombre y configuración.
+        
         Args:
             strategy_name: Nombre de la estrategia
                           ('quality_of_life', 'tourist', 'convenience')
@@ -45,8 +61,15 @@ class StrategyFactory:
                 f"Disponibles: {available}"
             )
         
-        strategy_class = cls._STRATEGIES[strategy_name]
-        return strategy_class(config=config)
+        key = (strategy_name, json.dumps(config or {}, sort_keys=True, default=str))
+        
+        strategy = cls._instance_cache.get(key)
+        if strategy is None:
+            strategy_class = cls._STRATEGIES[strategy_name]
+            strategy = strategy_class(config=config)
+            cls._instance_cache[key] = strategy
+        
+        return strategy
     
     @classmethod
     def create_all_strategies(
@@ -68,8 +91,7 @@ class StrategyFactory:
             ...     print(f"{name}: {strategy.get_description()}")
         """
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+            config = _load_yaml(config_path, os.path.getmtime(config_path))
         except Exception as e:
             print(f" Error cargando config: {e}")
             config = {}
@@ -77,9 +99,9 @@ class StrategyFactory:
         strategies_config = config.get('strategies', {})
         strategies = {}
         
-        for name, strategy_class in cls._STRATEGIES.items():
+        for name in cls._STRATEGIES:
             strategy_config = strategies_config.get(name, {})
-            strategies[name] = strategy_class(config=strategy_config)
+            strategies[name] = cls.create_strategy(name, strategy_config)
         
         return strategies
     
@@ -19,6 +19,21 @@ class TouristStrategy(BaseStrategy):
     - Zonas inseguras para turistas
     """
     
+    PENALTY_RULES = (
+        # Turistas son más vulnerables: penalización del 30% si safety < 0.4
+        ({'safety': 0.4}, 0.7),
+        # Penalización leve si safety < 0.6
+        ({'safety': 0.6}, 0.9),
+    )
+    BONUS_RULES = (
+        # Alta concentración de servicios (services > 0.7): bonus del 15%
+        ({'services': 0.7}, 1.15),
+        # Excelente transporte, metro (transport > 0.8): bonus del 10%
+        ({'transport': 0.8}, 1.1),
+    )
+    PENALTY_DEFAULTS = {'safety': 0.5}
+    BONUS_DEFAULTS = {'services': 0.0, 'transport': 0.0}
+    
     def _default_weights(self) -> Dict[str, float]:
         return {
             'services': 0.40,
@@ -31,44 +46,4 @@ class TouristStrategy(BaseStrategy):
         return "Turista/Visitante"
     
     def get_description(self) -> str:
-        return "Enfoca en atractivos turísticos, seguridad y facilidad de movilidad"
-    
-    def apply_penalties(self, metrics: Dict[str, float], base_score: float) -> float:
-        """
-        Penaliza zonas inseguras (turistas son más vulnerables).
-        
-        Si safety < 0.4, penalización más agresiva que otras estrategias.
-        """
-        safety = metrics.get('safety', 0.5)
-        
-        if safety < 0.4:
-            # Penalización del 30% (más severa que para residentes)
-            penalty = 0.7
-            return base_score * penalty
-        elif safety < 0.6:
-            # Penalización leve
-            penalty = 0.9
-            return base_score * penalty
-        
-        return base_score
-    
-    def apply_bonuses(self, metrics: Dict[str, float], base_score: float) -> float:
-        """
-        Bonificación por alta concentración de servicios turísticos.
-        
-        Si services > 0.7, dar bonus del 15%.
-        """
-        services = metrics.get('services', 0.0)
-        transport = metrics.get('transport', 0.0)
-        
-        # Bonus por muchos servicios
-        if services > 0.7:
-            bonus = 1.15
-            return min(base_score * bonus, 1.0)
-        
-        # Bonus por excelente transporte (metro)
-        if transport > 0.8:
-            bonus = 1.1
-            return min(base_score * bonus, 1.0)
-        
-        return base_score
\ No newline at end of file
+        return "Enfoca en atractivos turísticos, seguridad y facilidad de movilidad"
\ No newline at end of file
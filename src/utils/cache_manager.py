@@ -1,10 +1,19 @@
+import logging
+import os
 import pickle
 import json
 import hashlib
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Any, Optional, Dict, Callable
+from typing import Any, Optional, Dict, Callable, List
 import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+logger = logging.getLogger(__name__)
+
+# Extensiones de los archivos de datos (Feather para DataFrames, pickle para el resto)
+CACHE_EXTENSIONS = ('feather', 'pkl')
 
 
 class CacheManager:    
@@ -44,14 +53,72 @@ class CacheManager:
         else:
             combined = identifier
         
-        # Hash MD5
-        hash_obj = hashlib.md5(combined.encode())
-        return hash_obj.hexdigest()[:16]
+        # BLAKE2b con digest de 8 bytes: mismos 16 caracteres hex que antes
+        hash_obj = hashlib.blake2b(combined.encode(), digest_size=8)
+        return hash_obj.hexdigest()
+    
+    def _version_prefix(self) -> str:
+        return f"cache_{self.version.replace('.', '_')}_"
     
     def _get_cache_path(self, key: str, extension: str = 'pkl') -> Path:
-        filename = f"cache_{key}.{extension}"
+        # La versión va en el nombre: un caché de otra versión no se encuentra
+        filename = f"{self._version_prefix()}{key}.{extension}"
         return self.cache_dir / filename
     
+    @staticmethod
+    def _meta_path(cache_path: Path) -> Path:
+        return cache_path.with_suffix('.meta.json')
+    
+    def _cache_files(self) -> List[os.DirEntry]:
+        """
+        Archivos de datos del caché en una sola lectura del directorio; las
+        entradas de scandir guardan el stat tras la primera consulta.
+        """
+        with os.scandir(self.cache_dir) as entries:
+            return [
+                entry for entry in entries
+                if entry.name.startswith('cache_')
+                and entry.name.rsplit('.', 1)[-1] in CACHE_EXTENSIONS
+                and entry.is_file()
+            ]
+    
+    def _remove(self, cache_path: Path):
+        """Borra un archivo de caché y, si es Feather, su metadata"""
+        cache_path.unlink(missing_ok=True)
+        if cache_path.suffix == '.feather':
+            self._meta_path(cache_path).unlink(missing_ok=True)
+    
+    def _write_feather(self, cache_path: Path, cache_obj: Dict) -> bool:
+        """
+        Guarda un DataFrame en Feather (LZ4) y el resto de campos en un
+        JSON al lado, ya que Feather no admite objetos Python arbitrarios.
+        
+        Returns:
+            bool: False si el DataFrame no es representable en Arrow
+        """
+        try:
+            feather.write_feather(cache_obj['data'], str(cache_path), compression='lz4')
+        except (pa.ArrowException, TypeError, ValueError):
+            cache_path.unlink(missing_ok=True)
+            return False
+        
+        meta = {k: v for k, v in cache_obj.items() if k != 'data'}
+        with open(self._meta_path(cache_path), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, default=str)
+        
+        return True
+    
+    def _load(self, cache_path: Path) -> Dict:
+        if cache_path.suffix != '.feather':
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        
+        with open(self._meta_path(cache_path), 'r', encoding='utf-8') as f:
+            cache_obj = json.load(f)
+        
+        cache_obj['data'] = feather.read_table(str(cache_path), memory_map=True).to_pandas()
+        return cache_obj
+    
     def set(
         self,
         identifier: str,
@@ -73,7 +140,6 @@ class CacheManager:
         """
         try:
             key = self._generate_key(identifier, params)
-            cache_path = self._get_cache_path(key)
             
             # Preparar estructura de caché
             cache_obj = {
@@ -85,17 +151,26 @@ class CacheManager:
                 'metadata': metadata or {}
             }
             
-            # Guardar
-            with open(cache_path, 'wb') as f:
-                pickle.dump(cache_obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+            # Guardar: DataFrames en Feather (los GeoDataFrame siguen en pickle)
+            cache_path = self._get_cache_path(key, 'feather')
+            if type(data) is not pd.DataFrame or not self._write_feather(cache_path, cache_obj):
+                cache_path = self._get_cache_path(key)
+                with open(cache_path, 'wb') as f:
+                    pickle.dump(cache_obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+            
+            # Quitar una versión previa guardada con el otro formato
+            for extension in CACHE_EXTENSIONS:
+                other_path = self._get_cache_path(key, extension)
+                if other_path != cache_path:
+                    self._remove(other_path)
             
-            file_size = cache_path.stat().st_size / 1024
-            print(f"Caché guardado: {cache_path.name} ({file_size:.1f} KB)")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Caché guardado: %s (%.1f KB)", cache_path.name, cache_path.stat().st_size / 1024)
             
             return True
             
         except Exception as e:
-            print(f"Error guardando caché: {e}")
+            logger.warning("Error guardando caché: %s", e)
             return False
     
     def get(
@@ -117,45 +192,51 @@ class CacheManager:
         """
         try:
             key = self._generate_key(identifier, params)
-            cache_path = self._get_cache_path(key)
             
-            if not cache_path.exists():
+            for extension in CACHE_EXTENSIONS:
+                cache_path = self._get_cache_path(key, extension)
+                try:
+                    mtime = cache_path.stat().st_mtime
+                    break
+                except FileNotFoundError:
+                    pass
+            else:
                 return None
             
-            # Cargar caché
-            with open(cache_path, 'rb') as f:
-                cache_obj = pickle.load(f)
-            
-            # Validar versión
-            if cache_obj.get('version') != self.version:
-                print(f"Versión de caché incompatible")
-                cache_path.unlink()
+            # Descartar por fecha de modificación antes de deserializar el archivo
+            age = datetime.now() - datetime.fromtimestamp(mtime)
+            if age > timedelta(hours=self.ttl_hours):
+                logger.debug("Caché expirado (%.1fh)", age.total_seconds() / 3600)
+                self._remove(cache_path)
                 return None
             
+            # Cargar caché
+            cache_obj = self._load(cache_path)
+            
             # Validar TTL
             timestamp = datetime.fromisoformat(cache_obj['timestamp'])
             age = datetime.now() - timestamp
             
             if age > timedelta(hours=self.ttl_hours):
-                print(f"Caché expirado ({age.total_seconds()/3600:.1f}h)")
-                cache_path.unlink()
+                logger.debug("Caché expirado (%.1fh)", age.total_seconds() / 3600)
+                self._remove(cache_path)
                 return None
             
             # Validar datos si se proporciona validador
             data = cache_obj['data']
             if validator and not validator(data):
-                print(f"Validación de caché falló")
-                cache_path.unlink()
+                logger.debug("Validación de caché falló")
+                self._remove(cache_path)
                 return None
             
-            print(f"Caché válido: {cache_path.name} (edad: {age.total_seconds()/3600:.1f}h)")
+            logger.debug("Caché válido: %s (edad: %.1fh)", cache_path.name, age.total_seconds() / 3600)
             return data
             
         except Exception as e:
-            print(f"Error leyendo caché: {e}")
+            logger.warning("Error leyendo caché: %s", e)
             # Limpiar caché corrupto
             try:
-                cache_path.unlink()
+                self._remove(cache_path)
             except:
                 pass
             return None
@@ -173,65 +254,97 @@ class CacheManager:
         """
         try:
             key = self._generate_key(identifier, params)
-            cache_path = self._get_cache_path(key)
             
-            if cache_path.exists():
-                cache_path.unlink()
-                print(f"🗑️  Caché invalidado: {cache_path.name}")
-                return True
-            else:
-                print(f"No existe caché para invalidar")
-                return False
+            for extension in CACHE_EXTENSIONS:
+                cache_path = self._get_cache_path(key, extension)
+                
+                if cache_path.exists():
+                    self._remove(cache_path)
+                    logger.debug("Caché invalidado: %s", cache_path.name)
+                    return True
+            
+            logger.debug("No existe caché para invalidar")
+            return False
                 
         except Exception as e:
-            print(f"Error invalidando caché: {e}")
+            logger.warning("Error invalidando caché: %s", e)
             return False
     
+    def cleanup_old_versions(self) -> int:
+        """
+        Elimina los cachés guardados con otra versión (incluidos los de
+        nombre sin versión), que get ya no puede encontrar.
+        
+        Returns:
+            int: Número de archivos eliminados
+        """
+        try:
+            prefix = self._version_prefix()
+            count = 0
+            
+            for cache_file in self._cache_files():
+                if cache_file.name.startswith(prefix):
+                    continue
+                try:
+                    self._remove(Path(cache_file))
+                    count += 1
+                except OSError:
+                    pass
+            
+            if count > 0:
+                logger.debug("%d caché(s) de versiones anteriores eliminado(s)", count)
+            
+            return count
+            
+        except Exception as e:
+            logger.warning("Error limpiando cachés de versiones anteriores: %s", e)
+            return 0
+    
     def clear_all(self) -> int:
         try:
-            cache_files = list(self.cache_dir.glob('cache_*.pkl'))
+            cache_files = self._cache_files()
             count = 0
             
             for cache_file in cache_files:
                 try:
-                    cache_file.unlink()
+                    self._remove(Path(cache_file))
                     count += 1
                 except:
                     pass
             
             if count > 0:
-                print(f"{count} caché(s) eliminado(s)")
+                logger.debug("%d caché(s) eliminado(s)", count)
             
             return count
             
         except Exception as e:
-            print(f"Error limpiando cachés: {e}")
+            logger.warning("Error limpiando cachés: %s", e)
             return 0
     
     def cleanup_expired(self) -> int:
         try:
-            cache_files = list(self.cache_dir.glob('cache_*.pkl'))
+            cache_files = self._cache_files()
             count = 0
             
+            # Límite de mtime calculado una vez para todos los archivos
+            oldest_valid = (datetime.now() - timedelta(hours=self.ttl_hours)).timestamp()
+            
             for cache_file in cache_files:
                 try:
                     # Verificar edad
-                    mtime = datetime.fromtimestamp(cache_file.stat().st_mtime)
-                    age = datetime.now() - mtime
-                    
-                    if age > timedelta(hours=self.ttl_hours):
-                        cache_file.unlink()
+                    if cache_file.stat().st_mtime < oldest_valid:
+                        self._remove(Path(cache_file))
                         count += 1
                 except:
                     pass
             
             if count > 0:
-                print(f"{count} caché(s) expirado(s) eliminado(s)")
+                logger.debug("%d caché(s) expirado(s) eliminado(s)", count)
             
             return count
             
         except Exception as e:
-            print(f"Error limpiando cachés expirados: {e}")
+            logger.warning("Error limpiando cachés expirados: %s", e)
             return 0
     
     def get_stats(self) -> Dict[str, Any]:
@@ -242,21 +355,20 @@ class CacheManager:
             Dict con estadísticas
         """
         try:
-            cache_files = list(self.cache_dir.glob('cache_*.pkl'))
+            cache_files = self._cache_files()
             
             total_size = 0
             valid_count = 0
             expired_count = 0
             
+            oldest_valid = (datetime.now() - timedelta(hours=self.ttl_hours)).timestamp()
+            
             for cache_file in cache_files:
                 try:
                     stat = cache_file.stat()
                     total_size += stat.st_size
                     
-                    mtime = datetime.fromtimestamp(stat.st_mtime)
-                    age = datetime.now() - mtime
-                    
-                    if age <= timedelta(hours=self.ttl_hours):
+                    if stat.st_mtime >= oldest_valid:
                         valid_count += 1
                     else:
                         expired_count += 1
@@ -273,5 +385,5 @@ class CacheManager:
             }
             
         except Exception as e:
-            print(f"Error obteniendo estadísticas: {e}")
+            logger.warning("Error obteniendo estadísticas: %s", e)
             return {}
\ No newline at end of file
@@ -0,0 +1,18 @@
+"""
+Compilación JIT opcional con numba.
+Si numba no está instalado, njit deja las funciones como Python puro y
+NUMBA_AVAILABLE permite elegir una ruta vectorizada con NumPy.
+"""
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+    
+    def njit(*args, **kwargs):
+        # Soporta tanto @njit como @njit(cache=True, ...)
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
@@ -6,10 +6,19 @@ Funciones auxiliares para análisis geográfico.
 import geopandas as gpd
 import pandas as pd
 import numpy as np
+import shapely
+from functools import lru_cache
+from pyproj import CRS, Transformer
 from shapely.geometry import Point, Polygon, MultiPolygon
 from shapely.strtree import STRtree
 from typing import Union, Optional, List
+import os
+import json
+import hashlib
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.jit import njit, NUMBA_AVAILABLE
 
 warnings.filterwarnings('ignore', category=UserWarning)
 
@@ -72,18 +81,15 @@ def calculate_area_coverage(
         if polygon_area == 0:
             return 0.0
         
-        # Filtrar geometrías que intersectan
-        intersecting = layer_gdf[layer_gdf.intersects(polygon)]
+        # Filtrar geometrías válidas que intersectan
+        intersecting = layer_gdf.geometry[layer_gdf.intersects(polygon)]
+        intersecting = intersecting[intersecting.is_valid]
         
         if len(intersecting) == 0:
             return 0.0
         
-        # Calcular área total de intersección
-        total_intersection_area = 0.0
-        for geom in intersecting.geometry:
-            if geom.is_valid:
-                intersection = polygon.intersection(geom)
-                total_intersection_area += intersection.area
+        # Calcular área total de intersección (una sola llamada vectorizada a GEOS)
+        total_intersection_area = float(intersecting.intersection(polygon).area.sum())
         
         # Calcular porcentaje
         coverage = min(total_intersection_area / polygon_area, 1.0)
@@ -386,4 +392,345 @@ def ensure_crs(gdf: gpd.GeoDataFrame, target_crs: str = 'EPSG:4326') -> gpd.GeoD
         
     except Exception as e:
         print(f"Error asegurando CRS: {e}")
-        return gdf
\ No newline at end of file
+        return gdf
+
+def read_shapefile(
+    path: str,
+    columns: Optional[List[str]] = None,
+    bbox: Optional[tuple] = None,
+    bbox_crs: str = 'EPSG:4326',
+    **kwargs
+) -> gpd.GeoDataFrame:
+    """
+    Lee un shapefile con el motor pyogrio y lectura vectorizada vía Arrow.
+    
+    Args:
+        path: Ruta al shapefile
+        columns: Columnas de atributos a leer (None = todas). La geometría
+                 siempre se incluye.
+        bbox: (minx, miny, maxx, maxy) para leer solo features cuyo envolvente
+              lo intersecta. El filtro se resuelve en GDAL con el índice espacial.
+        bbox_crs: CRS en el que está expresado bbox (default WGS84). None
+                  indica que bbox ya está en el CRS del archivo.
+        **kwargs: Argumentos adicionales para gpd.read_file
+        
+    Returns:
+        GeoDataFrame: Datos leídos del archivo
+        
+    Example:
+        >>> routes = read_shapefile(settings.SHP_BUS_ROUTES, columns=['Código_Ru'])
+    """
+    kwargs.setdefault('engine', 'pyogrio')
+    kwargs.setdefault('use_arrow', True)
+    
+    if columns is not None:
+        kwargs['columns'] = list(columns)
+    
+    if bbox is not None:
+        file_bbox = tuple(bbox) if bbox_crs is None else _bbox_in_file_crs(path, bbox, bbox_crs)
+        if file_bbox is not None:
+            kwargs['bbox'] = file_bbox
+    
+    return gpd.read_file(path, **kwargs)
+
+
+def read_cached_shapefile(
+    path: str,
+    loader,
+    params: Optional[dict] = None
+) -> Optional[gpd.GeoDataFrame]:
+    """
+    Carga un GeoDataFrame derivado de un shapefile reutilizando una copia
+    GeoParquet junto al archivo mientras sea más reciente que el original.
+    
+    Args:
+        path: Ruta al shapefile de origen
+        loader: Función sin argumentos que lee y procesa el shapefile
+        params: Parámetros que afectan el resultado (forman parte del nombre
+                del archivo de caché)
+        
+    Returns:
+        GeoDataFrame: Resultado de loader (o de la caché), None si falla
+        
+    Example:
+        >>> stops = read_cached_shapefile(path, load_stops, {'bbox': bbox})
+    """
+    cache_path = f"{path}.{_params_key(params)}.wgs84.parquet"
+    
+    try:
+        if os.path.getmtime(cache_path) >= os.path.getmtime(path):
+            return _read_geoparquet(cache_path)
+    except OSError:
+        pass
+    
+    gdf = loader()
+    _write_geoparquet(gdf, cache_path)
+    return gdf
+
+
+def read_cached_geodataframe(
+    cache_dir: str,
+    name: str,
+    loader,
+    params: Optional[dict] = None
+) -> Optional[gpd.GeoDataFrame]:
+    """
+    Carga un GeoDataFrame sin archivo de origen (ej: descargas de OSM)
+    reutilizando una copia GeoParquet en cache_dir si existe.
+    
+    Args:
+        cache_dir: Directorio de la caché
+        name: Prefijo del archivo de caché
+        loader: Función sin argumentos que descarga y procesa los datos
+        params: Parámetros que identifican la consulta (forman parte del
+                nombre del archivo de caché)
+        
+    Returns:
+        GeoDataFrame: Resultado de loader (o de la caché), None si falla
+        
+    Example:
+        >>> parks = read_cached_geodataframe(cache_dir, 'parks', load_parks, {'tags': tags})
+    """
+    cache_path = os.path.join(cache_dir, f"{name}.{_params_key(params)}.parquet")
+    
+    if os.path.exists(cache_path):
+        try:
+            return _read_geoparquet(cache_path)
+        except Exception as e:
+            print(f"No se pudo leer la caché {cache_path}: {e}")
+    
+    gdf = loader()
+    if gdf is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+    _write_geoparquet(gdf, cache_path)
+    return gdf
+
+
+def _params_key(params: Optional[dict]) -> str:
+    return hashlib.blake2b(
+        json.dumps(params or {}, sort_keys=True, default=str).encode(), digest_size=4
+    ).hexdigest()
+
+
+def _read_geoparquet(cache_path: str) -> gpd.GeoDataFrame:
+    gdf = gpd.read_parquet(cache_path)
+    
+    # GeoParquet guarda el CRS como PROJJSON: restaurar el código EPSG
+    epsg = gdf.crs.to_epsg() if gdf.crs is not None else None
+    if epsg is not None:
+        gdf = gdf.set_crs(epsg, allow_override=True)
+    return gdf
+
+
+def _write_geoparquet(gdf: Optional[gpd.GeoDataFrame], cache_path: str):
+    if gdf is None:
+        return
+    try:
+        gdf.to_parquet(cache_path)
+    except Exception as e:
+        print(f"No se pudo guardar la caché {cache_path}: {e}")
+
+
+def _bbox_in_file_crs(path: str, bbox: tuple, bbox_crs: str) -> Optional[tuple]:
+    """
+    Expresa bbox en el CRS del archivo (pyogrio no reproyecta el filtro).
+    Retorna None si el archivo no declara CRS y no se puede convertir.
+    """
+    import pyogrio
+    
+    file_crs = pyogrio.read_info(path).get('crs')
+    if file_crs is None:
+        return None
+    
+    if CRS.from_user_input(file_crs).equals(CRS.from_user_input(bbox_crs)):
+        return tuple(bbox)
+    
+    return get_transformer(bbox_crs, file_crs).transform_bounds(*bbox)
+
+
+# Por debajo de este número de geometrías no compensa repartir en hilos
+PARALLEL_REPROJECT_THRESHOLD = 50_000
+
+
+@lru_cache(maxsize=16)
+def get_transformer(source_crs: str, target_crs: str) -> Transformer:
+    """
+    Retorna un Transformer de pyproj reutilizable (x=lon, y=lat).
+    
+    Construir un Transformer es costoso; se cachea por par de CRS.
+    
+    Args:
+        source_crs: CRS de origen (ej: 'EPSG:32717')
+        target_crs: CRS de destino (ej: 'EPSG:4326')
+        
+    Returns:
+        Transformer: Transformer con always_xy=True
+    """
+    return Transformer.from_crs(source_crs, target_crs, always_xy=True)
+
+
+def transform_geometries(geometries, transformer: Transformer) -> np.ndarray:
+    """
+    Aplica un Transformer a un array de geometrías en una sola llamada,
+    sobre el array completo de coordenadas.
+    
+    Args:
+        geometries: Array (o GeometryArray) de geometrías shapely
+        transformer: Transformer de pyproj con always_xy=True
+        
+    Si todas son puntos 2D no vacíos (paradas, estaciones) se transforman
+    directamente los arrays x/y y se reconstruyen los puntos, sin recorrer
+    las coordenadas con shapely.transform.
+    
+    Returns:
+        np.ndarray: Geometrías reproyectadas
+    """
+    geometries = np.asarray(geometries)
+    
+    if len(geometries) > 0 and _all_plain_points(geometries):
+        lon, lat = transformer.transform(shapely.get_x(geometries), shapely.get_y(geometries))
+        return shapely.points(lon, lat)
+    
+    return shapely.transform(
+        geometries,
+        lambda xy: np.column_stack(transformer.transform(xy[:, 0], xy[:, 1]))
+    )
+
+
+def _all_plain_points(geometries: np.ndarray) -> bool:
+    """True si todas las geometrías son Point 2D no vacíos"""
+    return bool(
+        (shapely.get_type_id(geometries) == shapely.GeometryType.POINT).all()
+        and not shapely.is_empty(geometries).any()
+        and not shapely.has_z(geometries).any()
+    )
+
+
+def reproject(
+    gdf: gpd.GeoDataFrame,
+    target_crs: str = 'EPSG:4326',
+    parallel: bool = False
+) -> gpd.GeoDataFrame:
+    """
+    Reproyecta un GeoDataFrame usando un Transformer cacheado.
+    
+    Equivale a gdf.to_crs(target_crs) pero reutiliza el Transformer entre
+    llamadas y transforma todas las coordenadas en bloque.
+    
+    Args:
+        gdf: GeoDataFrame con CRS definido
+        target_crs: CRS objetivo
+        parallel: Si True y hay al menos PARALLEL_REPROJECT_THRESHOLD
+                  geometrías, transforma por bloques en varios hilos
+                  (PROJ y GEOS liberan el GIL)
+        
+    Returns:
+        GeoDataFrame: GeoDataFrame en el CRS objetivo
+        
+    Example:
+        >>> stops_wgs84 = reproject(stops_utm_gdf, 'EPSG:4326')
+    """
+    if gdf.crs is None:
+        raise ValueError("No se puede reproyectar un GeoDataFrame sin CRS")
+    
+    target = CRS.from_user_input(target_crs)
+    if gdf.crs.equals(target):
+        return gdf
+    
+    transformer = get_transformer(gdf.crs.srs, target.srs)
+    geometries = np.asarray(gdf.geometry.values)
+    
+    if parallel and len(geometries) >= PARALLEL_REPROJECT_THRESHOLD:
+        workers = os.cpu_count() or 1
+        chunks = np.array_split(geometries, workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(lambda chunk: transform_geometries(chunk, transformer), chunks))
+        geometries = np.concatenate(parts)
+    else:
+        geometries = transform_geometries(geometries, transformer)
+    
+    result = gdf.copy()
+    result[gdf.geometry.name] = gpd.GeoSeries(geometries, index=gdf.index, crs=target)
+    return result.set_crs(target, allow_override=True)
+
+
+# Sin fastmath: permitiría a LLVM asumir que no hay NaN ni infinitos y
+# eliminar justamente los descartes de coordenadas inválidas
+@njit(cache=True)
+def _coords_in_bounds_kernel(x, y, xmin, ymin, xmax, ymax):
+    n = x.shape[0]
+    out = np.empty(n, dtype=np.bool_)
+    for i in range(n):
+        xi = x[i]
+        yi = y[i]
+        out[i] = (
+            np.isfinite(xi) and np.isfinite(yi)
+            and (xmin < xi < xmax) and (ymin < yi < ymax)
+        )
+    return out
+
+
+def coords_in_bounds(x: np.ndarray, y: np.ndarray, bounds: tuple) -> np.ndarray:
+    """
+    Máscara de coordenadas finitas estrictamente dentro de bounds.
+    
+    Usa un kernel numba de una sola pasada si está disponible; si no,
+    la expresión equivalente con NumPy. Es lo mismo que
+    shapely.contains_xy(box(*bounds), x, y) sin pasar por GEOS, que para
+    un rectángulo resulta bastante más lento que las comparaciones.
+    
+    Args:
+        x: Array de coordenadas x
+        y: Array de coordenadas y
+        bounds: (minx, miny, maxx, maxy)
+        
+    Returns:
+        np.ndarray: Máscara booleana
+        
+    Example:
+        >>> mask = coords_in_bounds(lons, lats, (-79, -0.5, -78, 0.1))
+    """
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    xmin, ymin, xmax, ymax = (float(b) for b in bounds)
+    
+    if NUMBA_AVAILABLE:
+        return _coords_in_bounds_kernel(x, y, xmin, ymin, xmax, ymax)
+    
+    return (
+        np.isfinite(x) & np.isfinite(y) &
+        (x > xmin) & (x < xmax) &
+        (y > ymin) & (y < ymax)
+    )
+
+
+def simplify_geometries(
+    gdf: gpd.GeoDataFrame,
+    tolerance: float,
+    grid_size: Optional[float] = None
+) -> gpd.GeoDataFrame:
+    """
+    Simplifica geometrías (preservando topología) y opcionalmente reduce
+    la precisión de coordenadas, para aligerar capas que solo se dibujan.
+    
+    Args:
+        gdf: GeoDataFrame a simplificar
+        tolerance: Tolerancia de simplificación en unidades del CRS
+        grid_size: Tamaño de grilla para redondear coordenadas (None = no redondear)
+        
+    Returns:
+        GeoDataFrame: Copia con geometrías simplificadas
+        
+    Example:
+        >>> light_gdf = simplify_geometries(crimes_wgs84, tolerance=1e-4, grid_size=1e-6)
+    """
+    if gdf is None or len(gdf) == 0:
+        return gdf
+    
+    geometries = shapely.simplify(np.asarray(gdf.geometry.values), tolerance, preserve_topology=True)
+    if grid_size is not None:
+        geometries = shapely.set_precision(geometries, grid_size)
+    
+    result = gdf.copy()
+    result[gdf.geometry.name] = gpd.GeoSeries(geometries, index=gdf.index, crs=gdf.crs)
+    return result
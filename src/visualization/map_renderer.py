@@ -5,6 +5,7 @@ import pandas as pd
 import branca.colormap as cm
 from typing import Optional, Dict, List, Tuple
 import numpy as np
+import shapely
 
 from strategies.base_strategy import BaseStrategy
 
@@ -21,12 +22,15 @@ class MapRenderer:
     def create_base_map(
         self,
         tiles: str = 'OpenStreetMap',
+        prefer_canvas: bool = True,
         **kwargs
     ) -> folium.Map:
+        # Canvas compartido para las capas vectoriales (paradas, estaciones)
         m = folium.Map(
             location=self.center,
             zoom_start=self.zoom_start,
             tiles=tiles,
+            prefer_canvas=prefer_canvas,
             **kwargs
         )
         
@@ -98,38 +102,42 @@ class MapRenderer:
         # Crear FeatureGroup para la capa
         feature_group = folium.FeatureGroup(name=layer_name)
         
-        # Agregar polígonos coloreados
-        for idx, row in merged.iterrows():
-            # Obtener color según score
-            score = row['score']
-            color = colormap(score)
+        # Colores y tooltips precalculados como propiedades de cada feature
+        merged['_color'] = [colormap(score) for score in merged['score'].to_numpy()]
+        merged['_tooltip'] = [
+            self._create_custom_tooltip(record, strategy)
+            for record in merged.drop(columns='geometry').to_dict('records')
+        ]
+        
+        # Agregar todos los polígonos coloreados en un solo GeoJson
+        folium.GeoJson(
+            merged[['_color', '_tooltip', 'geometry']].to_json(),
+            style_function=lambda x: {
+                'fillColor': x['properties']['_color'],
+                'color': 'black',
+                'weight': 2,
+                'fillOpacity': 0.7
+            },
+            highlight_function=lambda x: {
+                'weight': 4,
+                'fillOpacity': 0.9
+            },
+            tooltip=folium.GeoJsonTooltip(fields=['_tooltip'], labels=False, sticky=True)
+        ).add_to(feature_group)
+        
+        # Agregar etiquetas si se solicita
+        if show_labels and 'district_name' in merged.columns:
+            # Centroides calculados en una sola pasada
+            centroids = shapely.centroid(merged.geometry.values)
+            lats = shapely.get_y(centroids)
+            lons = shapely.get_x(centroids)
             
-            # Crear tooltip
-            tooltip_html = self._create_custom_tooltip(row, strategy)
-            
-            # Crear polígono
-            folium.GeoJson(
-                row['geometry'],
-                style_function=lambda x, color=color: {
-                    'fillColor': color,
-                    'color': 'black',
-                    'weight': 2,
-                    'fillOpacity': 0.7
-                },
-                highlight_function=lambda x: {
-                    'weight': 4,
-                    'fillOpacity': 0.9
-                },
-                tooltip=folium.Tooltip(tooltip_html, sticky=True)
-            ).add_to(feature_group)
-            
-            # Agregar etiqueta si se solicita
-            if show_labels and 'district_name' in row:
-                # Obtener centroide
-                centroid = row['geometry'].centroid
+            for lat, lon, name in zip(lats, lons, merged['district_name'].to_numpy()):
+                if pd.isna(name):
+                    continue
                 
                 folium.Marker(
-                    location=[centroid.y, centroid.x],
+                    location=[lat, lon],
                     icon=folium.DivIcon(
                         html=f'''
                         <div style="
@@ -140,7 +148,7 @@ class MapRenderer:
                             white-space: nowrap;
                             text-shadow: 1px 1px 2px white, -1px -1px 2px white;
                         ">
-                            {row['district_name'][:20]}
+                            {name[:20]}
                         </div>
                         '''
                     )
@@ -310,12 +318,18 @@ class MapRenderer:
         Returns:
             Mapa con etiquetas
         """
-        for idx, row in districts_gdf.iterrows():
-            if label_field in row and pd.notna(row[label_field]):
-                centroid = row.geometry.centroid
-                
+        if label_field not in districts_gdf.columns:
+            return m
+        
+        # Centroides calculados en una sola pasada
+        centroids = shapely.centroid(districts_gdf.geometry.values)
+        lats = shapely.get_y(centroids)
+        lons = shapely.get_x(centroids)
+        
+        for lat, lon, label in zip(lats, lons, districts_gdf[label_field].to_numpy()):
+            if pd.notna(label):
                 folium.Marker(
-                    location=[centroid.y, centroid.x],
+                    location=[lat, lon],
                     icon=folium.DivIcon(
                         html=f'''
                         <div style="
@@ -327,7 +341,7 @@ class MapRenderer:
                             border-radius: 3px;
                             border: 1px solid #999;
                         ">
-                            {row[label_field][:25]}
+                            {label[:25]}
                         </div>
                         '''
                     )
@@ -420,6 +434,7 @@ class MapRenderer:
         if layers_config.get('metro', False) or layers_config.get('bus_routes', False) or layers_config.get('bus_stops', False):
             try:
                 transport_integration = CityTransportIntegration()
+                factories = []
                 
                 # Metro
                 if layers_config.get('metro', False):
@@ -428,7 +443,7 @@ class MapRenderer:
                         settings.SHP_METRO_STATIONS,
                         system_name="Metro de Quito"
                     )
-                    transport_integration.add_transport_system(metro_factory)
+                    factories.append(metro_factory)
                 
                 # Buses
                 if layers_config.get('bus_routes', False) or layers_config.get('bus_stops', False):
@@ -443,7 +458,10 @@ class MapRenderer:
                         max_routes=50 if show_routes else 0,
                         max_stops=1000 if show_stops else 0
                     )
-                    transport_integration.add_transport_system(bus_factory)
+                    factories.append(bus_factory)
+                
+                # Metro y buses se leen en paralelo
+                transport_integration.add_transport_systems(factories)
                 
                 # Agregar al mapa
                 transport_integration.add_layers_to_map(m)
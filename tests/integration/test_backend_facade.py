@@ -21,6 +21,14 @@ class TestRecommendationSystemIntegration:
     assert system.rec_observer is not None
     assert system.cache_observer is not None
     
+  def test_metrics_analyzed_on_first_access(self, system):
+    assert system._metrics_df is None
+    
+    metrics_df = system.metrics_df
+    
+    assert metrics_df is not None
+    assert system.metrics_df is metrics_df
+    
   def test_set_strategy(self, system):
     success = system.set_strategy('quality_of_life')
     
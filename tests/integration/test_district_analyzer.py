@@ -40,6 +40,30 @@ class TestDistrictAnalyzerIntegration:
       assert metrics_df[col].min() >= 0.0
       assert metrics_df[col].max() <= 1.0
   
+  def test_batch_scores_match_per_district_fallback(self, analyzer_with_data, monkeypatch):
+    from analyzers import district_analyzer
+    
+    calls = []
+    batch = district_analyzer.calculate_scores_batch
+    
+    def spy(*args, **kwargs):
+      calls.append(args)
+      return batch(*args, **kwargs)
+    
+    monkeypatch.setattr(district_analyzer, 'calculate_scores_batch', spy)
+    batch_df = analyzer_with_data.analyze_all_districts(force_refresh=True).copy()
+    
+    assert len(calls) == 1
+    
+    def failing_batch(*args, **kwargs):
+      raise RuntimeError('sjoin no disponible')
+    
+    monkeypatch.setattr(district_analyzer, 'calculate_scores_batch', failing_batch)
+    fallback_df = analyzer_with_data.analyze_all_districts(force_refresh=True)
+    
+    for col in ['safety', 'transport', 'green', 'services']:
+      assert batch_df[col].to_numpy() == pytest.approx(fallback_df[col].to_numpy())
+  
   def test_cache_functionality(self, analyzer_with_data):
     import time
     
@@ -99,4 +123,34 @@ class TestDistrictAnalyzerIntegration:
     assert 'cache_file' in info
     assert 'exists' in info
     assert 'enabled' in info
-    assert 'ttl_hours' in info
\ No newline at end of file
+    assert 'ttl_hours' in info
+  
+  def test_route_connectivity_uses_route_ids(self, analyzer, mock_districts_gdf, tmp_path, monkeypatch):
+    import geopandas as gpd
+    from shapely.geometry import LineString
+    from settings import settings
+    from analyzers.metrics_calculator import calculate_transport_score
+    
+    routes_path = tmp_path / 'rutas.shp'
+    gpd.GeoDataFrame({
+      'Código_Ru': ['R1', 'R2', 'R2'],
+      'otro': [1, 2, 3],
+      'geometry': [
+        LineString([(0.1, 0.1), (0.9, 0.9)]),
+        LineString([(0.2, 0.8), (0.8, 0.2)]),
+        LineString([(1.2, 0.5), (1.8, 0.5)])
+      ]
+    }, crs='EPSG:4326').to_file(routes_path, encoding='utf-8')
+    
+    monkeypatch.setattr(settings, 'SHP_BUS_ROUTES', str(routes_path))
+    analyzer.load_data(districts_gdf=mock_districts_gdf)
+    
+    assert 'Código_Ru' in analyzer.bus_routes_gdf.columns
+    
+    # Solo hay rutas: el score de transporte es la conectividad de rutas
+    connectivity = calculate_transport_score(
+      mock_districts_gdf.iloc[0].geometry,
+      bus_routes_gdf=analyzer.bus_routes_gdf
+    )
+    
+    assert connectivity == pytest.approx(2 / 5)
@@ -1,8 +1,10 @@
 import pytest
+import os
 import pickle
 import time
 from pathlib import Path
 from datetime import datetime, timedelta
+import pandas as pd
 
 from utils.cache_manager import CacheManager
 
@@ -68,6 +70,51 @@ class TestCacheManager:
     
     assert retrieved is None
     
+  def test_expired_file_not_unpickled(self, tmp_path, monkeypatch):
+    cache_mgr = CacheManager(cache_dir=str(tmp_path), ttl_hours=1)
+    cache_mgr.set('test', {'data': 'test'})
+    
+    cache_path = cache_mgr._get_cache_path(cache_mgr._generate_key('test'))
+    old_mtime = time.time() - 2 * 3600
+    os.utime(cache_path, (old_mtime, old_mtime))
+    
+    def fail_load(*args, **kwargs):
+      raise AssertionError("pickle.load no debería llamarse")
+    
+    monkeypatch.setattr(pickle, 'load', fail_load)
+    
+    assert cache_mgr.get('test') is None
+    assert not cache_path.exists()
+    
+  def test_dataframe_stored_as_feather(self, tmp_path):
+    cache_mgr = CacheManager(cache_dir=str(tmp_path))
+    df = pd.DataFrame(
+      {'district_name': ['A', 'B'], 'score': [0.5, 0.8]},
+      index=pd.Index([10, 20], name='district_id')
+    )
+    
+    assert cache_mgr.set('scores', df, params={'strategy': 'tourist'})
+    
+    key = cache_mgr._generate_key('scores', {'strategy': 'tourist'})
+    assert cache_mgr._get_cache_path(key, 'feather').exists()
+    assert not cache_mgr._get_cache_path(key).exists()
+    
+    pd.testing.assert_frame_equal(cache_mgr.get('scores', params={'strategy': 'tourist'}), df)
+    
+    assert cache_mgr.invalidate('scores', params={'strategy': 'tourist'})
+    assert list(tmp_path.iterdir()) == []
+    
+  def test_dataframe_not_arrow_compatible_uses_pickle(self, tmp_path):
+    cache_mgr = CacheManager(cache_dir=str(tmp_path))
+    df = pd.DataFrame({'value': [{'a': 1}, 2]})
+    
+    assert cache_mgr.set('mixed', df)
+    
+    key = cache_mgr._generate_key('mixed')
+    assert cache_mgr._get_cache_path(key).exists()
+    assert list(tmp_path.glob('*.feather')) == []
+    pd.testing.assert_frame_equal(cache_mgr.get('mixed'), df)
+    
   def test_set_with_metadata(self, mock_cache_manager):
     data = {'test': 'data'}
     metadata = {'created_by': 'test', 'version': '1.0'}
@@ -151,6 +198,26 @@ class TestCacheManager:
     assert 'expired_files' in stats
     assert 'total_size_mb' in stats
     assert stats['total_files'] == 2
+    
+  def test_get_stats_counts_expired_and_feather(self, tmp_path):
+    cache_mgr = CacheManager(cache_dir=str(tmp_path), ttl_hours=1)
+    
+    cache_mgr.set('fresh', {'data': 1})
+    cache_mgr.set('frame', pd.DataFrame({'a': [1, 2]}))
+    cache_mgr.set('stale', {'data': 2})
+    
+    stale_path = cache_mgr._get_cache_path(cache_mgr._generate_key('stale'))
+    old_mtime = time.time() - 2 * 3600
+    os.utime(stale_path, (old_mtime, old_mtime))
+    
+    stats = cache_mgr.get_stats()
+    
+    assert stats['total_files'] == 3
+    assert stats['valid_files'] == 2
+    assert stats['expired_files'] == 1
+    
+    assert cache_mgr.cleanup_expired() == 1
+    assert not stale_path.exists()
     assert stats['valid_files'] == 2
     
   def test_generate_key_consistency(self, mock_cache_manager):
@@ -182,4 +249,16 @@ class TestCacheManager:
     
     result = cache_mgr_v2.get('test')
     
-    assert result is None
\ No newline at end of file
+    assert result is None
+    
+  def test_cleanup_old_versions(self, tmp_path):
+    cache_mgr_v1 = CacheManager(cache_dir=str(tmp_path), version='1.0.0')
+    cache_mgr_v1.set('test', {'data': 'v1'})
+    cache_mgr_v1.set('frame', pd.DataFrame({'a': [1, 2]}))
+    
+    cache_mgr_v2 = CacheManager(cache_dir=str(tmp_path), version='2.0.0')
+    cache_mgr_v2.set('test', {'data': 'v2'})
+    
+    assert cache_mgr_v2.cleanup_old_versions() == 2
+    assert cache_mgr_v2.get('test') == {'data': 'v2'}
+    assert all(path.name.startswith('cache_2_0_0_') for path in tmp_path.iterdir())
\ No newline at end of file
@@ -1,11 +1,17 @@
+import gc
+import weakref
 import pytest
 import geopandas as gpd
+from shapely.geometry import Point
+
+from analyzers import metrics_calculator
 
 from analyzers.metrics_calculator import (
   calculate_safety_score,
   calculate_transport_score,
   calculate_green_score,
-  calculate_services_score
+  calculate_services_score,
+  calculate_scores_batch
 )
 
 
@@ -83,4 +89,59 @@ class TestServicesScore:
     
     score = calculate_services_score(district, mock_tourist_places_gdf)
     
-    assert 0.0 <= score <= 1.0
\ No newline at end of file
+    assert 0.0 <= score <= 1.0
+
+@pytest.mark.unit
+class TestScoresBatch:
+  def test_batch_matches_per_district(
+    self, mock_districts_gdf, mock_crime_gdf, mock_parks_gdf, mock_tourist_places_gdf
+  ):
+    batch = calculate_scores_batch(
+      mock_districts_gdf,
+      crime_gdf=mock_crime_gdf,
+      parks_gdf=mock_parks_gdf,
+      tourist_places_gdf=mock_tourist_places_gdf,
+      min_park_area=0.0
+    )
+    
+    for idx, district in zip(mock_districts_gdf.index, mock_districts_gdf.geometry):
+      assert batch.loc[idx, 'safety'] == pytest.approx(
+        calculate_safety_score(district, mock_crime_gdf)
+      )
+      assert batch.loc[idx, 'green'] == pytest.approx(
+        calculate_green_score(district, mock_parks_gdf, min_park_area=0.0)
+      )
+      assert batch.loc[idx, 'services'] == pytest.approx(
+        calculate_services_score(district, mock_tourist_places_gdf)
+      )
+  
+  def test_batch_without_layers(self, mock_districts_gdf):
+    batch = calculate_scores_batch(mock_districts_gdf)
+    
+    assert list(batch.index) == list(mock_districts_gdf.index)
+    assert (batch['safety'] == 0.5).all()
+    assert (batch['green'] == 0.0).all()
+    assert (batch['services'] == 0.0).all()
+
+
+@pytest.mark.unit
+class TestWgs84Cache:
+  def _utm_layer(self):
+    return gpd.GeoDataFrame(geometry=[Point(500000, 9800000)], crs='EPSG:32717')
+  
+  def test_reuses_reprojection(self):
+    layer = self._utm_layer()
+    
+    assert metrics_calculator._to_wgs84(layer) is metrics_calculator._to_wgs84(layer)
+  
+  def test_does_not_keep_layer_alive(self):
+    layer = self._utm_layer()
+    metrics_calculator._to_wgs84(layer)
+    key = id(layer)
+    ref = weakref.ref(layer)
+    
+    del layer
+    gc.collect()
+    
+    assert ref() is None
+    assert key not in metrics_calculator._wgs84_cache
@@ -1,4 +1,6 @@
 import pytest
+import numpy as np
+import pandas as pd
 from unittest.mock import Mock, MagicMock
 
 from observers.map_state import MapState, Observer
@@ -39,6 +41,25 @@ class TestMapState:
     assert observer not in mock_map_state._observers
     assert len(mock_map_state._observers) == 0
   
+  def test_attach_with_change_types(self, mock_map_state, mock_quality_strategy):
+    observer = Mock(spec=Observer)
+    mock_map_state.attach(observer, change_types={'param'})
+    
+    mock_map_state.set_strategy(mock_quality_strategy)
+    observer.update.assert_not_called()
+    
+    mock_map_state.set_param('key', 'value')
+    observer.update.assert_called_once()
+  
+  def test_detach_typed_observer(self, mock_map_state):
+    observer = Mock(spec=Observer)
+    mock_map_state.attach(observer, change_types={'param'})
+    mock_map_state.detach(observer)
+    
+    mock_map_state.set_param('key', 'value')
+    
+    observer.update.assert_not_called()
+  
   def test_notify_observers(self, mock_map_state, mock_quality_strategy):
     observer = Mock(spec=Observer)
     mock_map_state.attach(observer)
@@ -117,6 +138,16 @@ class TestMapState:
     assert mock_map_state.viewport_bounds == bounds
     observer.update.assert_called_once()
   
+  def test_small_viewport_change_not_notified(self, mock_map_state):
+    observer = Mock(spec=Observer)
+    mock_map_state.attach(observer)
+    
+    bounds = {'north': 1.001, 'south': -0.999, 'east': 1.001, 'west': -0.999}
+    mock_map_state.set_viewport_bounds(bounds)
+    mock_map_state.set_viewport_bounds({key: value + 0.005 for key, value in bounds.items()})
+    
+    observer.update.assert_called_once()
+  
   def test_set_param(self, mock_map_state):
     observer = Mock(spec=Observer)
     mock_map_state.attach(observer)
@@ -178,6 +209,55 @@ class TestRecommendationObserver:
     assert 'score' in observer.current_scores.columns
     assert 'rank' in observer.current_scores.columns
   
+  def test_ranks_match_pandas_min_rank(self, mock_map_state, mock_quality_strategy):
+    mock_analyzer = Mock()
+    mock_analyzer.metrics_df = pd.DataFrame({
+      'district_name': ['a', 'b', 'c', 'd'],
+      'safety': [0.5, 0.9, 0.5, 0.1],
+      'transport': [0.5, 0.9, 0.5, 0.1],
+      'green': [0.5, 0.9, 0.5, 0.1],
+      'services': [0.5, 0.9, 0.5, 0.1]
+    })
+    
+    observer = RecommendationObserver(mock_analyzer)
+    observer.update(mock_map_state, 'strategy', new_strategy=mock_quality_strategy)
+    
+    scores = observer.get_scores_df()
+    expected = scores['score'].rank(ascending=False, method='min').astype(int)
+    
+    assert scores['rank'].tolist() == expected.tolist() == [1, 2, 2, 4]
+    assert scores['score'].is_monotonic_decreasing
+  
+  def test_scores_stored_as_float32(self, mock_map_state, mock_quality_strategy, mock_scores_df):
+    mock_analyzer = Mock()
+    mock_analyzer.metrics_df = mock_scores_df
+    
+    observer = RecommendationObserver(mock_analyzer)
+    observer.update(mock_map_state, 'strategy', new_strategy=mock_quality_strategy)
+    
+    scores = observer.get_scores_df()
+    
+    for column in ['safety', 'transport', 'green', 'services', 'score']:
+      assert scores[column].dtype == np.float32
+    
+    details = observer.get_district_score(scores.iloc[0]['district_name'])
+    assert type(details['score']) is float
+  
+  def test_metrics_df_left_untouched(self, mock_map_state, mock_quality_strategy, mock_scores_df):
+    mock_analyzer = Mock()
+    mock_analyzer.metrics_df = mock_scores_df
+    original = mock_scores_df.copy()
+    
+    observer = RecommendationObserver(mock_analyzer)
+    observer.update(mock_map_state, 'strategy', new_strategy=mock_quality_strategy)
+    
+    scores = observer.get_scores_df()
+    
+    pd.testing.assert_frame_equal(mock_scores_df, original)
+    assert scores['district_name'].dtype == original['district_name'].dtype
+    assert sorted(scores['district_name']) == sorted(original['district_name'])
+    assert scores.index.equals(pd.RangeIndex(len(original)))
+  
   def test_update_ignore_other_changes(self, mock_map_state):
     mock_analyzer = Mock()
     observer = RecommendationObserver(mock_analyzer)
@@ -224,6 +304,23 @@ class TestRecommendationObserver:
     assert 'score' in details
     assert 'rank' in details
     assert 'metrics' in details
+  
+  def test_get_district_score_unknown_and_reset(self, mock_map_state, mock_quality_strategy, mock_scores_df):
+    mock_analyzer = Mock()
+    mock_analyzer.metrics_df = mock_scores_df
+    
+    observer = RecommendationObserver(mock_analyzer)
+    observer.update(mock_map_state, 'strategy', new_strategy=mock_quality_strategy)
+    
+    district_name = mock_scores_df.iloc[0]['district_name']
+    details = observer.get_district_score(district_name)
+    row = observer.current_scores[observer.current_scores['district_name'] == district_name].iloc[0]
+    
+    assert details['rank'] == row['rank']
+    assert observer.get_district_score('Distrito inexistente') is None
+    
+    observer.update(mock_map_state, 'reset')
+    assert observer.get_district_score(district_name) is None
 
 
 @pytest.mark.unit
@@ -1,4 +1,9 @@
 import pytest
+import os
+import time
+import numpy as np
+import pandas as pd
+from strategies import base_strategy
 from strategies.base_strategy import BaseStrategy
 from strategies.qol_strategy import QualityOfLifeStrategy
 from strategies.tourist_strategy import TouristStrategy
@@ -59,6 +64,27 @@ class TestQualityOfLifeStrategy:
     assert score_safe > score_unsafe
 
 
+@pytest.mark.unit
+@pytest.mark.strategy
+class TestPartialMetrics:
+  def test_missing_metrics_use_rule_defaults(self):
+    # Tourist: safety ausente vale 0.5 -> penalización leve
+    assert TouristStrategy().apply_penalties({'services': 0.9}, 1.0) == pytest.approx(0.9)
+    # Convenience: transport ausente vale 0.0 -> falta acceso básico
+    assert ConvenienceStrategy().apply_penalties({'services': 0.9}, 1.0) == pytest.approx(0.85)
+    # QoL: safety ausente vale 0.5 -> sin penalización
+    assert QualityOfLifeStrategy().apply_penalties({'green': 0.9}, 1.0) == pytest.approx(1.0)
+
+  def test_missing_metrics_never_trigger_bonuses(self, all_strategies):
+    for strategy in all_strategies.values():
+      assert strategy.apply_bonuses({}, 0.5) == pytest.approx(0.5)
+
+  def test_present_nan_does_not_use_default(self):
+    assert ConvenienceStrategy().apply_penalties(
+      {'services': 0.9, 'transport': np.nan}, 1.0
+    ) == pytest.approx(1.0)
+
+
 @pytest.mark.unit
 @pytest.mark.strategy
 class TestStrategyFactory:
@@ -74,4 +100,180 @@ class TestStrategyFactory:
     assert len(all_strategies) == 3
     assert 'quality_of_life' in all_strategies
     assert 'tourist' in all_strategies
-    assert 'convenience' in all_strategies
\ No newline at end of file
+    assert 'convenience' in all_strategies
+  
+  def test_create_all_strategies_rereads_modified_config(self, tmp_path):
+    config_path = tmp_path / 'config.yaml'
+    config_path.write_text("strategies:\n  tourist:\n    weights:\n      safety: 0.1\n")
+    
+    first = StrategyFactory.create_all_strategies(str(config_path))
+    
+    config_path.write_text("strategies:\n  tourist:\n    weights:\n      safety: 0.2\n")
+    os.utime(config_path, (time.time() + 10, time.time() + 10))
+    
+    second = StrategyFactory.create_all_strategies(str(config_path))
+    
+    assert first['tourist'].get_weights()['safety'] == 0.1
+    assert second['tourist'].get_weights()['safety'] == 0.2
+    
+  def test_create_strategy_reuses_instance(self):
+    config = {'weights': {'safety': 0.5}}
+    
+    strategy = StrategyFactory.create_strategy('tourist', config)
+    
+    assert StrategyFactory.create_strategy('tourist', dict(config)) is strategy
+    assert StrategyFactory.create_strategy('tourist') is not strategy
+
+
+@pytest.mark.unit
+@pytest.mark.strategy
+class TestBatchScores:
+  def test_batch_matches_row_by_row(self, all_strategies):
+    rng = np.random.default_rng(0)
+    metrics_df = pd.DataFrame(
+      rng.uniform(0, 1, size=(200, 4)),
+      columns=['safety', 'transport', 'green', 'services']
+    )
+    metrics_df.loc[0, 'green'] = np.nan
+    
+    for strategy in all_strategies.values():
+      expected = [
+        strategy.calculate_final_score(row)
+        for row in metrics_df.to_dict('records')
+      ]
+      
+      np.testing.assert_allclose(strategy.calculate_final_score_batch(metrics_df), expected)
+  
+  def test_batch_uses_config_weights(self):
+    strategy = QualityOfLifeStrategy({'weights': {'services': 0.5}})
+    metrics = {
+      'safety': np.array([0.2, np.nan]),
+      'transport': np.array([0.4, 0.6]),
+      'green': np.array([0.6, 0.8])
+    }
+    
+    expected = [
+      strategy.calculate_score({k: v[i] for k, v in metrics.items()})
+      for i in range(2)
+    ]
+    
+    np.testing.assert_allclose(strategy.calculate_score_batch(metrics), expected)
+  
+  def test_kernel_matches_row_by_row(self, all_strategies, monkeypatch):
+    # Sin numba los kernels corren como Python puro: misma lógica
+    monkeypatch.setattr(base_strategy, 'NUMBA_AVAILABLE', True)
+    
+    rng = np.random.default_rng(1)
+    metrics_df = pd.DataFrame(
+      rng.uniform(0, 1, size=(200, 4)),
+      columns=['safety', 'transport', 'green', 'services']
+    )
+    metrics_df.loc[0, 'safety'] = np.nan
+    metrics_df.loc[1, :] = np.nan
+    
+    for strategy in all_strategies.values():
+      assert strategy._supports_kernel()
+      
+      expected = [
+        strategy.calculate_final_score(row)
+        for row in metrics_df.to_dict('records')
+      ]
+      
+      np.testing.assert_allclose(strategy.calculate_final_score_batch(metrics_df), expected)
+  
+  def test_compiled_kernel_matches_scalar(self, all_strategies):
+    # Solo con numba instalado: ejecuta el kernel compilado (paralelo)
+    pytest.importorskip("numba")
+    
+    rng = np.random.default_rng(2)
+    values = rng.uniform(0, 1, size=(500, 4))
+    # Filas con métricas sin dato y valores justo en los umbrales
+    values[0, :] = np.nan
+    values[1, 0] = np.nan
+    values[2, 1:3] = np.nan
+    values[3, :] = [0.3, 0.3, 0.6, 0.7]
+    values[4, :] = [0.4, 0.8, np.nan, 0.7]
+    
+    for strategy in all_strategies.values():
+      expected = [
+        strategy.calculate_final_score(dict(zip(base_strategy.METRIC_COLUMNS, row)))
+        for row in values
+      ]
+      
+      out = np.empty(len(values))
+      base_strategy._score_kernel(
+        np.ascontiguousarray(values), strategy._weight_vec,
+        strategy._penalty_thresholds, strategy._penalty_factors,
+        strategy._bonus_thresholds, strategy._bonus_factors,
+        out
+      )
+      
+      np.testing.assert_allclose(out, expected)
+  
+  def test_rules_only_subclass_uses_kernel(self, monkeypatch):
+    monkeypatch.setattr(base_strategy, 'NUMBA_AVAILABLE', True)
+    
+    class GreenStrategy(QualityOfLifeStrategy):
+      PENALTY_RULES = (({'green': 0.5}, 0.5),)
+      BONUS_RULES = ()
+    
+    strategy = GreenStrategy()
+    metrics_df = pd.DataFrame({
+      'safety': [0.9, 0.9],
+      'transport': [0.9, 0.9],
+      'green': [0.2, 0.9],
+      'services': [0.5, 0.5]
+    })
+    
+    expected = [
+      strategy.calculate_final_score(row)
+      for row in metrics_df.to_dict('records')
+    ]
+    
+    assert strategy._supports_kernel()
+    assert expected[0] < expected[1]
+    np.testing.assert_allclose(strategy.calculate_final_score_batch(metrics_df), expected)
+  
+  def test_scalar_only_subclass_falls_back_to_rows(self):
+    class SafetyPenaltyStrategy(QualityOfLifeStrategy):
+      def apply_penalties(self, metrics, base_score):
+        return base_score * 0.5 if metrics['safety'] < 0.5 else base_score
+    
+    strategy = SafetyPenaltyStrategy()
+    metrics_df = pd.DataFrame({
+      'safety': [0.2, 0.9],
+      'transport': [0.5, 0.5],
+      'green': [0.5, 0.5],
+      'services': [0.5, 0.5]
+    })
+    
+    expected = [
+      strategy.calculate_final_score(row)
+      for row in metrics_df.to_dict('records')
+    ]
+    
+    assert not strategy._supports_batch()
+    assert not strategy._supports_kernel()
+    assert QualityOfLifeStrategy()._supports_batch()
+    np.testing.assert_allclose(strategy.calculate_final_score_batch(metrics_df), expected)
+  
+  def test_final_score_override_falls_back_to_rows(self, monkeypatch):
+    class FixedStrategy(QualityOfLifeStrategy):
+      def calculate_final_score(self, metrics):
+        return 0.123
+    
+    strategy = FixedStrategy()
+    metrics_df = pd.DataFrame({
+      'safety': [0.2, 0.9],
+      'transport': [0.5, 0.9],
+      'green': [0.5, 0.9],
+      'services': [0.5, 0.5]
+    })
+    
+    assert not strategy._supports_batch()
+    assert not strategy._supports_kernel()
+    np.testing.assert_allclose(strategy.calculate_final_score_batch(metrics_df), [0.123, 0.123])
+    
+    # Tampoco con el kernel disponible
+    monkeypatch.setattr(base_strategy, 'NUMBA_AVAILABLE', True)
+    np.testing.assert_allclose(strategy.calculate_final_score_batch(metrics_df), [0.123, 0.123])